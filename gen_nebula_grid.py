@@ -27,7 +27,7 @@ variants = [
 
 fig, axes = plt.subplots(3, 3, figsize=(18, 18))
 fig.patch.set_facecolor("#05172c")
-fig.subplots_adjust(hspace=0.08, wspace=0.04)
+fig.subplots_adjust(left=0.01, right=0.99, bottom=0.01, top=0.98, hspace=0.08, wspace=0.04)
 
 for i, (bright, contr, sat, alph) in enumerate(variants):
     ax = axes[i // 3][i % 3]
@@ -46,6 +46,6 @@ for i, (bright, contr, sat, alph) in enumerate(variants):
 
 out_path = Path(__file__).parent / "output" / "style_test" / "sky" / "nebula_grid_9.png"
 out_path.parent.mkdir(parents=True, exist_ok=True)
-fig.savefig(out_path, dpi=110, bbox_inches="tight", facecolor="#05172c")
+fig.savefig(out_path, dpi=110, facecolor="#05172c")
 plt.close(fig)
 print(out_path)
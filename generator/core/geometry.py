@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.path import Path as MplPath
+from pyproj import CRS, Transformer
+from shapely.geometry import Point, Polygon, box
+
+
+@lru_cache(maxsize=32)
+def project_center(center_lat: float, center_lon: float) -> tuple[CRS, Point]:
+    """
+    Local UTM CRS and projected map center, as ox.projection.project_gdf
+    would return them for the single center point.
+
+    Cached so repeated renders of the same place (preview, then print) and
+    every engine skip the GeoDataFrame round-trip and UTM lookup.
+    """
+
+    crs = gpd.GeoSeries([Point(center_lon, center_lat)], crs="EPSG:4326").estimate_utm_crs()
+    x, y = Transformer.from_crs("EPSG:4326", crs, always_xy=True).transform(center_lon, center_lat)
+    return crs, Point(x, y)
+
+
+@dataclass(frozen=True)
+class MapFrame:
+    crs: CRS
+    center: Point
+    clip_rect: Polygon
+    clip_wgs: Polygon
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """(minx, maxx, miny, maxy) in the projected CRS."""
+        minx, miny, maxx, maxy = self.clip_rect.bounds
+        return minx, maxx, miny, maxy
+
+    @cached_property
+    def boundary(self):
+        """Frame outline line, built once and shared by every union that needs it."""
+        return self.clip_rect.boundary
+
+    def crop_wgs84(self, gdf: gpd.GeoDataFrame, pad_deg: float = 1e-3) -> gpd.GeoDataFrame:
+        """
+        Drop EPSG:4326 features whose bbox misses the (padded) frame, so
+        only features that can survive the clip get reprojected.
+        """
+
+        if len(gdf) == 0:
+            return gdf
+
+        minlon, minlat, maxlon, maxlat = self.clip_wgs.bounds
+        bounds = shapely.bounds(np.asarray(gdf.geometry.values))
+
+        hit = (
+            (bounds[:, 0] <= maxlon + pad_deg)
+            & (bounds[:, 2] >= minlon - pad_deg)
+            & (bounds[:, 1] <= maxlat + pad_deg)
+            & (bounds[:, 3] >= minlat - pad_deg)
+        )
+        return gdf[hit]
+
+
+@lru_cache(maxsize=32)
+def map_frame(
+    center_lat: float,
+    center_lon: float,
+    half_width_m: float,
+    half_height_m: float,
+) -> MapFrame:
+    """
+    Projected frame shared by every engine: UTM CRS, projected center,
+    prepared clip rectangle and the same rectangle in WGS84 for OSM queries.
+
+    MapFrame is immutable, so one instance is reused for every render of
+    the same place and extent (other palettes, preview then print), which
+    also skips the WGS84 reprojection of the rectangle.
+    """
+
+    crs, center = project_center(center_lat, center_lon)
+
+    clip_rect = box(
+        center.x - half_width_m,
+        center.y - half_height_m,
+        center.x + half_width_m,
+        center.y + half_height_m,
+    )
+    clip_wgs = gpd.GeoSeries([clip_rect], crs=crs).to_crs("EPSG:4326").iloc[0]
+
+    # Every layer is filtered against this one rectangle.
+    shapely.prepare(clip_rect)
+
+    return MapFrame(crs=crs, center=center, clip_rect=clip_rect, clip_wgs=clip_wgs)
+
+
+def clip_to_rect(gdf: gpd.GeoDataFrame, clip_rect) -> gpd.GeoDataFrame:
+    """
+    Vectorized replacement for gpd.clip against the map frame rectangle.
+
+    `clip_rect` is the axis-aligned frame box, so containment is decided on
+    the bounds arrays alone:
+
+    - Geometries fully outside the frame are dropped
+    - Geometries fully inside are kept untouched
+    - Only geometries straddling the frame edge are cut: lines through the
+      GEOS rectangle fast path (clip_by_rect), polygons through a full
+      intersection so they stay valid for later unions
+    - Empty results are dropped, index and columns are preserved
+    """
+
+    if len(gdf) == 0:
+        return gdf
+
+    geoms = np.asarray(gdf.geometry.values)
+
+    rminx, rminy, rmaxx, rmaxy = clip_rect.bounds
+    bounds = shapely.bounds(geoms)
+
+    outside = (
+        (bounds[:, 0] > rmaxx)
+        | (bounds[:, 2] < rminx)
+        | (bounds[:, 1] > rmaxy)
+        | (bounds[:, 3] < rminy)
+        | np.isnan(bounds[:, 0])
+    )
+    inside = (
+        (bounds[:, 0] >= rminx)
+        & (bounds[:, 2] <= rmaxx)
+        & (bounds[:, 1] >= rminy)
+        & (bounds[:, 3] <= rmaxy)
+    )
+    straddle = ~(outside | inside)
+
+    lines = straddle & np.isin(shapely.get_type_id(geoms), (1, 2, 5))
+    areas = straddle & ~lines
+
+    clipped = geoms.copy()
+    clipped[lines] = shapely.clip_by_rect(geoms[lines], rminx, rminy, rmaxx, rmaxy)
+    clipped[areas] = shapely.intersection(geoms[areas], clip_rect)
+
+    keep = ~outside
+    keep[straddle] = ~shapely.is_empty(clipped[straddle])
+
+    subset = gdf[keep]
+
+    return subset.set_geometry(
+        gpd.GeoSeries(
+            clipped[keep],
+            index=subset.index,
+            crs=gdf.crs,
+            name=gdf.geometry.name,
+        )
+    )
+
+
+def _spread_bits_16(v: np.ndarray) -> np.ndarray:
+    v = v.astype(np.uint32)
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton_order(geoms) -> np.ndarray:
+    """
+    Permutation that sorts `geoms` along a Z-order curve of their bbox
+    centers, so spatial neighbours sit next to each other in memory for the
+    collection builders and any tree queries that follow.
+    """
+
+    geoms = np.asarray(geoms, dtype=object)
+    if len(geoms) == 0:
+        return np.arange(0)
+
+    bounds = shapely.bounds(geoms)
+    cx = np.nan_to_num((bounds[:, 0] + bounds[:, 2]) * 0.5)
+    cy = np.nan_to_num((bounds[:, 1] + bounds[:, 3]) * 0.5)
+
+    def _quantize(v: np.ndarray) -> np.ndarray:
+        lo, hi = v.min(), v.max()
+        return ((v - lo) * (65535.0 / max(hi - lo, 1e-9))).astype(np.uint16)
+
+    codes = _spread_bits_16(_quantize(cx)) | (_spread_bits_16(_quantize(cy)) << 1)
+    return np.argsort(codes, kind="stable")
+
+
+def polygon_paths(geoms) -> tuple[list, list, np.ndarray]:
+    """
+    Matplotlib path data for every polygon part of `geoms`.
+
+    Returns (verts, codes, source_index): one vertex/code array per polygon
+    part, holes included as extra closed rings, plus the position of the
+    input geometry each part came from. Rings are oriented (exterior CCW,
+    holes CW) so holes stay open under any fill rule.
+    """
+
+    geoms = np.asarray(geoms, dtype=object)
+
+    parts, source = shapely.get_parts(geoms, return_index=True)
+    parts, nested = shapely.get_parts(parts, return_index=True)
+    source = source[nested]
+
+    keep = (shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)
+    parts = shapely.orient_polygons(parts[keep])
+    source = source[keep]
+
+    if len(parts) == 0:
+        return [], [], source
+
+    rings, ring_poly = shapely.get_rings(parts, return_index=True)
+    coords, vertex_ring = shapely.get_coordinates(rings, return_index=True)
+
+    codes = np.full(len(coords), MplPath.LINETO, dtype=MplPath.code_type)
+    ring_starts = np.flatnonzero(np.r_[True, vertex_ring[1:] != vertex_ring[:-1]])
+    codes[ring_starts] = MplPath.MOVETO
+    codes[np.r_[ring_starts[1:], len(coords)] - 1] = MplPath.CLOSEPOLY
+
+    split_at = np.flatnonzero(np.diff(ring_poly[vertex_ring])) + 1
+
+    return np.split(coords, split_at), np.split(codes, split_at), source
+
+
+def add_polygons(ax, geoms, *, facecolor, zorder, **kwargs) -> PolyCollection:
+    """
+    Draw polygons as one PolyCollection instead of one patch per geometry.
+
+    `facecolor` is a single color or one color per input geometry.
+    """
+
+    verts, codes, source = polygon_paths(geoms)
+
+    if not isinstance(facecolor, str):
+        facecolor = np.asarray(facecolor)[source]
+
+    kwargs.setdefault("edgecolors", "none")
+    kwargs.setdefault("linewidths", 0)
+
+    collection = PolyCollection([], facecolors=facecolor, zorder=zorder, **kwargs)
+    collection.set_verts_and_codes(verts, codes)
+
+    ax.add_collection(collection, autolim=False)
+
+    return collection
+
+
+def line_segments(geoms) -> tuple[list, np.ndarray]:
+    """
+    Vertex arrays for every linear part of `geoms`.
+
+    Returns (segments, source_index): one (n, 2) array per LineString part
+    plus the position of the input geometry each part came from.
+    """
+
+    geoms = np.asarray(geoms, dtype=object)
+
+    parts, source = shapely.get_parts(geoms, return_index=True)
+    parts, nested = shapely.get_parts(parts, return_index=True)
+    source = source[nested]
+
+    keep = np.isin(shapely.get_type_id(parts), (1, 2)) & ~shapely.is_empty(parts)
+    parts = parts[keep]
+    source = source[keep]
+
+    if len(parts) == 0:
+        return [], source
+
+    # Ragged layout: one flat coordinate block plus per-part offsets, the
+    # same (coords, offsets) pair shapely.to_ragged_array builds for lines.
+    coords = shapely.get_coordinates(parts)
+    offsets = np.cumsum(shapely.get_num_coordinates(parts))
+
+    return np.split(coords, offsets[:-1]), source
+
+
+def add_lines(ax, geoms, *, color, linewidth, zorder, **kwargs) -> LineCollection:
+    """
+    Draw lines as one LineCollection instead of going through geopandas.
+
+    `linewidth` is a single width or one width per input geometry.
+    """
+
+    segments, source = line_segments(geoms)
+
+    if np.ndim(linewidth) > 0:
+        linewidth = np.asarray(linewidth)[source]
+
+    collection = LineCollection(
+        segments,
+        colors=color,
+        linewidths=linewidth,
+        zorder=zorder,
+        **kwargs,
+    )
+
+    ax.add_collection(collection, autolim=False)
+
+    return collection
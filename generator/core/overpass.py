@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict
+
+
+# The public Overpass server allows about two concurrent slots per IP.
+# More parallel queries only earn 429s and osmnx back-off waits, so every
+# engine submits its downloads to this one process-wide pool; concurrent
+# renders share the same two slots.
+OVERPASS_SLOTS = 2
+
+overpass_pool = ThreadPoolExecutor(
+    max_workers=OVERPASS_SLOTS,
+    thread_name_prefix="overpass",
+)
+
+
+def overpass_results(futures: Dict[str, Future]) -> Dict[str, Any]:
+    """
+    Wait for every query in `futures` and return the results by key.
+
+    If one query fails, the ones still queued are cancelled before the
+    error propagates, so they do not hold the shared slots.
+    """
+    try:
+        return {key: future.result() for key, future in futures.items()}
+    except BaseException:
+        for future in futures.values():
+            future.cancel()
+        raise
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pandas as pd
+
+
+ROAD_CLASS = {
+    "motorway": "highway",
+    "trunk": "highway",
+    "primary": "arterial",
+    "secondary": "arterial",
+    "tertiary": "arterial",
+    "residential": "local",
+    "unclassified": "local",
+    "living_street": "local",
+}
+
+
+def classify_road(highway: pd.Series) -> pd.Series:
+    """Road class per edge; anything not in ROAD_CLASS is "minor"."""
+
+    # Merged OSMnx edges carry a list of tags; the first one decides.
+    highway = highway.map(lambda v: v[0] if isinstance(v, list) else v)
+    # Categorical: the later width lookup maps 4 categories, not every edge.
+    return highway.map(ROAD_CLASS).fillna("minor").astype("category")
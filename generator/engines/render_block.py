@@ -11,16 +11,20 @@ import math
 import hashlib
 
 import geopandas as gpd
-import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
 import numpy as np
 import osmnx as ox
+import shapely
 
-from shapely.geometry import Point, box
-from shapely.ops import polygonize, unary_union
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from generator.specs import ProductSpec
 from generator.styles import get_style_config
 from generator.core.cache import load_or_build_geometry
+from generator.core.geometry import add_lines, add_polygons, clip_to_rect, map_frame, morton_order
+from generator.core.overpass import overpass_pool, overpass_results
+from generator.core.roads import classify_road
 
 
 @dataclass(frozen=True)
@@ -29,26 +33,61 @@ class MapLayerResult:
     output_png: Optional[Path] = None
 
 
-def _classify_road(hw: str) -> str:
-
-    hw = str(hw)
-
-    if hw in {"motorway", "trunk"}:
-        return "highway"
-
-    if hw in {"primary", "secondary", "tertiary"}:
-        return "arterial"
-
-    if hw in {"residential", "unclassified", "living_street"}:
-        return "local"
+# OSM vertices are far denser than any print can show. Half a metre is
+# invisible at every product size but cuts the vertex count that
+# union/polygonize and the renderer have to walk; line endpoints are kept,
+# so junction noding is unaffected. Fixed rather than derived from the
+# dpi: preview and print must polygonize the same cells, or every block's
+# WKB-seeded colour changes between the approved preview and the print.
+_SIMPLIFY_TOL_M = 0.5
+
+
+def _fetch_water(clip_wgs) -> gpd.GeoDataFrame:
+    # Broader OSM tags for sea/harbor/basin coverage.
+    try:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "natural": ["water", "bay", "strait"],
+                "water": True,
+                "waterway": ["riverbank", "canal"],
+                "landuse": ["basin", "reservoir"],
+            }
+        )
+    except Exception:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "natural": "water",
+                "waterway": "riverbank"
+            }
+        )
 
-    return "minor"
+def _fetch_coast(clip_wgs) -> Optional[gpd.GeoDataFrame]:
+    try:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={"natural": "coastline"}
+        )
+    except Exception:
+        return None
+
+def _fetch_islands(clip_wgs) -> Optional[gpd.GeoDataFrame]:
+    try:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "place": ["island", "islet"],
+                "natural": "island",
+            },
+        )
+    except Exception:
+        return None
 
-def _deterministic_color(geom, palette):
+def _deterministic_color_index(geom, palette_size: int) -> int:
     key = geom.wkb
     h = hashlib.md5(key).hexdigest()
-    idx = int(h, 16) % len(palette)
-    return palette[idx]
+    return int(h, 16) % palette_size
 
 def render_map_block(
     *,
@@ -86,67 +125,67 @@ def render_map_block(
 
     def _build_geometry():
 
-        center = gpd.GeoDataFrame(
-            geometry=[Point(center_lon, center_lat)],
-            crs="EPSG:4326"
-        )
-
-        center_p = ox.projection.project_gdf(center).geometry.iloc[0]
-
-        minx = center_p.x - half_width_m
-        maxx = center_p.x + half_width_m
-        miny = center_p.y - half_height_m
-        maxy = center_p.y + half_height_m
-
-        clip_rect = box(minx, miny, maxx, maxy)
+        frame = map_frame(center_lat, center_lon, half_width_m, half_height_m)
+
+        target_crs = frame.crs
+        center_p = frame.center
+        clip_rect = frame.clip_rect
+        clip_wgs = frame.clip_wgs
+
+        # DOWNLOADS
+        # Road graph, water, coastline and islands are independent Overpass
+        # queries; they share the process-wide Overpass slots.
+
+        downloads = overpass_results({
+            "graph": overpass_pool.submit(
+                ox.graph_from_point,
+                (center_lat, center_lon),
+                dist=dist_m,
+                network_type="all",
+                simplify=True,
+            ),
+            "water": overpass_pool.submit(_fetch_water, clip_wgs),
+            "coast": overpass_pool.submit(_fetch_coast, clip_wgs),
+            "islands": overpass_pool.submit(_fetch_islands, clip_wgs),
+        })
+
+        G = downloads["graph"]
+        water = downloads["water"]
+        coast = downloads["coast"]
+        islands = downloads["islands"]
 
         # ROADS
 
-        G = ox.graph_from_point(
-            (center_lat, center_lon),
-            dist=dist_m,
-            network_type="all",
-            simplify=True,
-        )
+        # Only the tag and the geometry are used; dropping the other
+        # ~15 OSM columns here keeps every later copy/reprojection lean.
+        edges = ox.graph_to_gdfs(G, nodes=False, edges=True)[["highway", "geometry"]]
 
-        edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
+        # graph_from_point reaches out to the frame diagonal (+300 m);
+        # drop what cannot survive the clip before reprojecting.
+        edges_p = frame.crop_wgs84(edges).to_crs(target_crs)
 
-        edges_p = ox.projection.project_gdf(edges)
+        edges_p = clip_to_rect(edges_p, clip_rect)
 
-        edges_p = gpd.clip(
-            edges_p,
-            gpd.GeoSeries([clip_rect], crs=edges_p.crs)
+        edges_p = edges_p.assign(
+            geometry=shapely.simplify(
+                np.asarray(edges_p.geometry.values),
+                _SIMPLIFY_TOL_M,
+                preserve_topology=False,
+            )
         )
 
-        edges_p["road_class"] = edges_p["highway"].apply(_classify_road)
+        edges_p["road_class"] = classify_road(edges_p["highway"])
 
-        # WATER (broader OSM tags for sea/harbor/basin coverage)
-
-        clip_gdf = gpd.GeoDataFrame(
-            geometry=[clip_rect],
-            crs=edges_p.crs
+        # Two-way streets come out of the MultiDiGraph twice (u->v and
+        # v->u, reversed geometry). Geometry work below (coast density,
+        # polygonize union) only needs each street once.
+        edge_geoms = np.asarray(edges_p.geometry.values)
+        _, first = np.unique(
+            shapely.to_wkb(shapely.normalize(edge_geoms)), return_index=True
         )
+        street_geoms = edge_geoms[np.sort(first)]
 
-        clip_wgs = clip_gdf.to_crs("EPSG:4326").geometry.iloc[0]
-
-        try:
-            water = ox.features_from_polygon(
-                clip_wgs,
-                tags={
-                    "natural": ["water", "bay", "strait"],
-                    "water": True,
-                    "waterway": ["riverbank", "canal"],
-                    "landuse": ["basin", "reservoir"],
-                }
-            )
-        except Exception:
-            water = ox.features_from_polygon(
-                clip_wgs,
-                tags={
-                    "natural": "water",
-                    "waterway": "riverbank"
-                }
-            )
+        # WATER
 
         if water is None or len(water) == 0:
             water_p = gpd.GeoDataFrame(geometry=[], crs=edges_p.crs)
@@ -154,52 +193,44 @@ def render_map_block(
         else:
 
             water = water[(~water.geometry.isna()) & (~water.geometry.is_empty)]
-            water_p = water.to_crs(edges_p.crs)
+            water_p = water[["geometry"]].to_crs(target_crs)
 
             water_p = water_p[
                 water_p.geom_type.isin(["Polygon", "MultiPolygon"])
             ]
 
-            water_p = gpd.clip(
-                water_p,
-                gpd.GeoSeries([clip_rect], crs=edges_p.crs)
-            )
-
-        # COASTLINE
-
-        try:
+            water_p = clip_to_rect(water_p, clip_rect)
 
-            coast = ox.features_from_polygon(
-                clip_wgs,
-                tags={"natural": "coastline"}
+            water_p = water_p.assign(
+                geometry=shapely.simplify(
+                    np.asarray(water_p.geometry.values),
+                    _SIMPLIFY_TOL_M,
+                    preserve_topology=True,
+                )
             )
 
-        except:
-
-            coast = None
+        # COASTLINE
 
         sea_poly = None
 
         if coast is not None and len(coast) > 0:
 
             coast = coast[(~coast.geometry.isna()) & (~coast.geometry.is_empty)]
-            coast_p = coast.to_crs(edges_p.crs)
+            coast_p = coast[["geometry"]].to_crs(target_crs)
 
             coast_lines = coast_p[
                 coast_p.geom_type.isin(["LineString", "MultiLineString"])
             ]
 
-            merged = unary_union(
-                list(coast_lines.geometry.values) +
-                [clip_rect.boundary]
-            )
+            merged = shapely.union_all(np.concatenate([
+                np.asarray(coast_lines.geometry.values),
+                np.array([frame.boundary], dtype=object),
+            ]))
 
-            polys = [
-                p for p in polygonize(merged)
-                if (not p.is_empty) and p.area > 0
-            ]
+            polys = shapely.get_parts(shapely.polygonize([merged]))
+            polys = polys[~shapely.is_empty(polys) & (shapely.area(polys) > 0)]
 
-            if polys:
+            if len(polys) > 0:
 
                 # Classify EACH coastline-bounded region as land or sea.
                 #
@@ -224,37 +255,38 @@ def render_map_block(
                 # robust without any expensive buffering (buffering the whole
                 # road network is far too slow and froze the render).
 
-                roads_union = (
-                    unary_union(list(edges_p.geometry.values))
-                    if len(edges_p) > 0 else None
+                # Road length is measured per region from the streets whose
+                # boxes hit it, instead of unioning the whole network first
+                # and intersecting every region with that one huge geometry.
+                # One bulk tree query yields every (region, street) pair; the
+                # clipped lengths are summed back per region with bincount.
+                street_tree = shapely.STRtree(street_geoms)
+                region_idx, street_idx = street_tree.query(polys, predicate="intersects")
+
+                road_len = np.bincount(
+                    region_idx,
+                    weights=shapely.length(
+                        shapely.intersection(street_geoms[street_idx], polys[region_idx])
+                    ),
+                    minlength=len(polys),
                 )
+                density = road_len / shapely.area(polys)
 
-                sea_regions = []
-
-                for p in polys:
+                # Region with the map center is always land.
+                # Built-up land: dense road network.
+                # Open sea: only sparse pier/shore coverage -> below thresh.
+                is_sea = ~shapely.contains(polys, center_p) & (density < 1e-2)
 
-                    if p.contains(center_p):
-                        # Region with the map center is always land.
-                        continue
-
-                    density = 0.0
-                    if roads_union is not None and p.area > 0:
-                        road_inside = p.intersection(roads_union)
-                        if not road_inside.is_empty:
-                            density = road_inside.length / p.area
-
-                    # Built-up land: dense road network.
-                    # Open sea: only sparse pier/shore coverage -> below thresh.
-                    if density < 1e-2:
-                        sea_regions.append(p)
-
-                if sea_regions:
-                    sea_poly = unary_union(sea_regions)
+                if is_sea.any():
+                    sea_poly = shapely.union_all(polys[is_sea])
 
         if sea_poly is not None:
 
             water_p = gpd.GeoDataFrame(
-                geometry=list(water_p.geometry) + [sea_poly],
+                geometry=np.concatenate([
+                    np.asarray(water_p.geometry.values),
+                    np.array([sea_poly], dtype=object),
+                ]),
                 crs=edges_p.crs
             )
 
@@ -263,36 +295,28 @@ def render_map_block(
         # ISLAND OVERRIDE
         # Remove explicit island polygons from water surfaces so they are
         # always rendered as land parcels.
-        try:
-            islands = ox.features_from_polygon(
-                clip_wgs,
-                tags={
-                    "place": ["island", "islet"],
-                    "natural": "island",
-                },
-            )
-        except Exception:
-            islands = None
-
         if islands is not None and len(islands) > 0 and len(water_p) > 0:
             islands = islands[(~islands.geometry.isna()) & (~islands.geometry.is_empty)]
-            islands_p = islands.to_crs(edges_p.crs)
+            islands_p = islands[["geometry"]].to_crs(target_crs)
             islands_p = islands_p[
                 islands_p.geom_type.isin(["Polygon", "MultiPolygon"])
             ]
 
             if len(islands_p) > 0:
-                islands_p = gpd.clip(
-                    islands_p,
-                    gpd.GeoSeries([clip_rect], crs=edges_p.crs)
-                )
+                islands_p = clip_to_rect(islands_p, clip_rect)
 
             if len(islands_p) > 0:
-                island_union = unary_union(islands_p.geometry)
-                water_p = water_p.copy()
-                water_p["geometry"] = water_p.geometry.apply(
-                    lambda geom: geom.difference(island_union)
-                )
+                island_union = shapely.union_all(np.asarray(islands_p.geometry.values))
+                # Prepared once: also reused by the island cell query below.
+                shapely.prepare(island_union)
+
+                # Only water bodies that actually touch an island need the
+                # overlay; the rest are kept as-is.
+                water_geoms = np.asarray(water_p.geometry.values)
+                touched = shapely.intersects(water_geoms, island_union)
+                cut = water_geoms.copy()
+                cut[touched] = shapely.difference(water_geoms[touched], island_union)
+                water_p = water_p.assign(geometry=cut)
                 water_p = water_p[
                     (~water_p.geometry.isna()) & (~water_p.geometry.is_empty)
                 ]
@@ -306,88 +330,104 @@ def render_map_block(
 
         # POLYGONIZE INPUT
 
-        boundary = clip_rect.boundary
-
-        lines = list(edges_p.geometry.values) + [boundary]
+        lines = [
+            street_geoms,
+            np.array([frame.boundary], dtype=object),
+        ]
 
         if len(large_water) > 0:
 
-            water_union = unary_union(large_water.geometry)
+            water_union = shapely.union_all(np.asarray(large_water.geometry.values))
 
-            lines += [water_union.boundary]
+            lines.append(np.array([water_union.boundary], dtype=object))
 
-        merged = unary_union(lines)
+        merged = shapely.union_all(np.concatenate(lines))
 
-        polygons = list(polygonize(merged))
+        polygons = shapely.get_parts(shapely.polygonize([merged]))
 
         cells = gpd.GeoDataFrame(
             geometry=polygons,
             crs=edges_p.crs
         )
 
-        cells = gpd.clip(
-            cells,
-            gpd.GeoSeries([clip_rect], crs=cells.crs)
-        )
+        cells = clip_to_rect(cells, clip_rect)
 
         # classify water cells
+        # One tree over the cells serves both the water and island passes;
+        # only cells that actually touch those unions are tested in detail.
+
+        cell_geoms = np.asarray(cells.geometry.values)
+        cell_tree = shapely.STRtree(cell_geoms)
+
+        is_water = np.zeros(len(cells), dtype=bool)
 
         if len(large_water) > 0:
 
-            water_union = unary_union(large_water.geometry)
+            # water_union was already built for the polygonize input above.
             # Small expansion helps fragmented shore segments, but only when
             # there is already true (unbuffered) water overlap.
             water_mask = water_union.buffer(5)
 
-            def is_water_cell(poly):
-
-                raw_inter = poly.intersection(water_union)
-                if raw_inter.is_empty:
-                    # Never classify as water from buffered overlap only.
-                    return False
-
-                poly_area = poly.area
-                if poly_area <= 0:
-                    return False
+            # All candidate cells from one tree query; overlap ratios are
+            # computed for the whole batch instead of cell by cell.
+            cand = cell_tree.query(water_union, predicate="intersects")
+            cand_geoms = cell_geoms[cand]
+            cand_area = shapely.area(cand_geoms)
+            valid = cand_area > 0
+
+            # Never classify as water from buffered overlap only: a zero
+            # raw ratio fails both tests below.
+            raw_ratio = np.zeros(len(cand))
+            raw_ratio[valid] = (
+                shapely.area(shapely.intersection(cand_geoms[valid], water_union))
+                / cand_area[valid]
+            )
 
-                raw_ratio = raw_inter.area / poly_area
-                if raw_ratio > 0.5:
-                    return True
+            cell_is_water = raw_ratio > 0.5
 
-                buffered_inter = poly.intersection(water_mask)
-                if buffered_inter.is_empty:
-                    return False
+            # The buffered overlap only decides the shore band.
+            shore = valid & (raw_ratio > 0.03) & ~cell_is_water
+            if shore.any():
+                buffered_ratio = (
+                    shapely.area(shapely.intersection(cand_geoms[shore], water_mask))
+                    / cand_area[shore]
+                )
+                cell_is_water[shore] = buffered_ratio > 0.2
 
-                buffered_ratio = buffered_inter.area / poly_area
-                return raw_ratio > 0.03 and buffered_ratio > 0.2
+            is_water[cand] = cell_is_water
 
-            cells["is_water"] = cells.geometry.apply(is_water_cell)
+        if island_union is not None:
 
-        else:
+            cand = cell_tree.query(island_union, predicate="intersects")
+            cand_geoms = cell_geoms[cand]
+            cand_area = shapely.area(cand_geoms)
+            valid = cand_area > 0
 
-            cells["is_water"] = False
+            island_ratio = np.zeros(len(cand))
+            island_ratio[valid] = (
+                shapely.area(shapely.intersection(cand_geoms[valid], island_union))
+                / cand_area[valid]
+            )
 
-        if island_union is not None:
+            is_water[cand[island_ratio > 0.15]] = False
 
-            def is_island_cell(poly):
-                inter = poly.intersection(island_union)
-                if inter.is_empty or poly.area <= 0:
-                    return False
-                return (inter.area / poly.area) > 0.15
+        cells["is_water"] = is_water
 
-            island_cells = cells.geometry.apply(is_island_cell)
-            cells.loc[island_cells, "is_water"] = False
+        # Z-order both layers once here (the result is cached), so the
+        # collections are built from spatially coherent runs.
+        cells = cells.iloc[morton_order(cells.geometry.values)]
+        edges_p = edges_p.iloc[morton_order(edges_p.geometry.values)]
 
         return {
             "cells": cells,
             "roads": edges_p,
-            "bounds": (minx, maxx, miny, maxy),
+            "bounds": frame.bounds,
         }
 
     if use_cache:
         geometry_data = load_or_build_geometry(
             # Bump cache key so previous misclassified geometry is not reused.
-            cache_prefix="block_v10_density",
+            cache_prefix="block_v13_simplified",
             center_lat=center_lat,
             center_lon=center_lon,
             extent_m=spec.extent_m,
@@ -403,54 +443,63 @@ def render_map_block(
 
     minx, maxx, miny, maxy = geometry_data["bounds"]
 
-    fig, ax = plt.subplots(
-        figsize=(fig_w_in, fig_h_in),
-        dpi=300
-    )
+    # A bare Figure on an Agg canvas: no pyplot figure registry to
+    # maintain or tear down for one-shot renders.
+    fig = Figure(figsize=(fig_w_in, fig_h_in), dpi=300)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
     water_cells = cells[cells["is_water"]]
-    land_cells = cells[~cells["is_water"]].copy()
+    land_cells = cells[~cells["is_water"]]
 
     if len(water_cells) > 0:
 
-        water_cells.plot(
-            ax=ax,
-            color=style_cfg.water,
-            edgecolor="none",
-            zorder=1
+        add_polygons(
+            ax,
+            water_cells.geometry.values,
+            facecolor=style_cfg.water,
+            zorder=1,
+            rasterized=True,
         )
 
-    land_cells ["color"] = [
-        _deterministic_color (geom, style_cfg.block_colors)
-        for geom in land_cells.geometry
+    # Parse the palette once and gather RGBA rows by index, instead of
+    # handing matplotlib one color string per cell.
+    palette_rgba = mcolors.to_rgba_array(style_cfg.block_colors)
+    land_colors = palette_rgba[
+        np.fromiter(
+            (
+                _deterministic_color_index(geom, len(palette_rgba))
+                for geom in land_cells.geometry
+            ),
+            dtype=np.intp,
+            count=len(land_cells),
+        )
     ]
 
-    land_cells.plot(
-        ax=ax,
-        color=land_cells["color"],
-        edgecolor="none",
-        zorder=2
+    add_polygons(
+        ax,
+        land_cells.geometry.values,
+        facecolor=land_colors,
+        zorder=2,
+        # The cell fills are embedded as one bitmap at the print dpi
+        # instead of thousands of vector paths; roads stay vector.
+        rasterized=True,
     )
 
-    base_width = style_cfg.road_style.base_width
-    multipliers = style_cfg.road_style.multipliers
+    road_widths = edges_p["road_class"].map(style_cfg.road_style.widths)
+    drawn = road_widths.notna().to_numpy()
 
-    for road_class, m in multipliers.items():
-
-        subset = edges_p[edges_p["road_class"] == road_class]
-
-        if len(subset) == 0:
-            continue
-
-        subset.plot(
-            ax=ax,
-            linewidth=base_width * m,
-            color=style_cfg.road,
-            zorder=3
-        )
+    add_lines(
+        ax,
+        edges_p.geometry.values[drawn],
+        color=style_cfg.road,
+        linewidth=road_widths.to_numpy(dtype=float)[drawn],
+        zorder=3,
+    )
 
     ax.set_xlim(minx, maxx)
     ax.set_ylim(miny, maxy)
+    ax.set_aspect("equal")
     ax.set_axis_off()
     ax.set_position([0, 0, 1, 1])
 
@@ -466,6 +515,7 @@ def render_map_block(
         fig.savefig(
             output_svg,
             format="svg",
+            dpi=spec.dpi,
             pad_inches=0,
         )
 
@@ -479,6 +529,5 @@ def render_map_block(
         )
         output_png = output_png_path
 
-    plt.close(fig)
 
     return MapLayerResult(output_svg=output_svg, output_png=output_png)
\ No newline at end of file
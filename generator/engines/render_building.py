@@ -4,22 +4,25 @@ import matplotlib
 matplotlib.use("Agg")
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
 import geopandas as gpd
+import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
 import osmnx as ox
-import random
+import shapely
 
 from osmnx._errors import InsufficientResponseError
 
-from shapely.geometry import Point, box
-from shapely.ops import unary_union, polygonize
-
 from generator.specs import ProductSpec
 from generator.styles import get_style_config, BuildingStyleConfig
+from generator.core.cache import load_or_build_geometry
+from generator.core.geometry import add_lines, add_polygons, clip_to_rect, map_frame
+from generator.core.overpass import overpass_pool, overpass_results
+from generator.core.roads import ROAD_CLASS
 
 
 # =============================================================================
@@ -35,6 +38,30 @@ class MapLayerResult:
 # HELPERS
 # =============================================================================
 
+_BUILDING_COLOR_WEIGHTS = (0.34, 0.28, 0.15, 0.12, 0.08, 0.03)
+
+
+@lru_cache(maxsize=None)
+def _building_color_cdf(palette_size: int) -> np.ndarray:
+    # Normalized cumulative weights per palette length.
+    if palette_size == len(_BUILDING_COLOR_WEIGHTS):
+        weights = list(_BUILDING_COLOR_WEIGHTS)
+    elif palette_size < len(_BUILDING_COLOR_WEIGHTS):
+        # Keep the intended front-loaded distribution and renormalize.
+        sliced = _BUILDING_COLOR_WEIGHTS[:palette_size]
+        total = sum(sliced)
+        weights = [w / total for w in sliced]
+    else:
+        # Fallback for longer custom palettes: uniform weights.
+        weights = [1.0] * palette_size
+
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    cdf.setflags(write=False)
+
+    return cdf
+
+
 def col(gdf, name):
     return gdf[name] if name in gdf.columns else None
 
@@ -59,23 +86,9 @@ def _is_mainline_railway(v) -> bool:
     return has_mainline and (not has_excluded)
 
 
-def _classify_road(hw: str):
-
-    hw = str(hw)
-
-    if hw in {"motorway", "trunk"}:
-        return "highway"
-
-    if hw in {"primary", "secondary", "tertiary"}:
-        return "arterial"
-
-    if hw in {"residential", "unclassified", "living_street"}:
-        return "local"
-
-    if hw in {"service"}:
-        return "minor"
-
-    return "local"
+# Shared road classes, except that only service roads are "minor" here;
+# every other unknown tag falls back to "local".
+_ROAD_CLASS = {**ROAD_CLASS, "service": "minor"}
 
 
 def _is_truthy_bridge(value) -> bool:
@@ -89,6 +102,7 @@ def _is_truthy_bridge(value) -> bool:
     return text in {"yes", "true", "1", "viaduct", "aqueduct", "movable"}
 
 
+@lru_cache(maxsize=128)
 def _hex_to_rgb(color: str) -> tuple[int, int, int]:
     value = color.strip().lstrip("#")
 
@@ -129,6 +143,7 @@ def _color_distance(a: str, b: str) -> float:
     return ((ar - br) ** 2 + (ag - bg) ** 2 + (ab - bb) ** 2) ** 0.5
 
 
+@lru_cache(maxsize=128)
 def _relative_luminance(color: str) -> float:
     rgb = [c / 255.0 for c in _hex_to_rgb(color)]
 
@@ -222,6 +237,25 @@ def _pick_bridge_color(
     return bridge_color
 
 
+def _plot_line_layer(
+    ax,
+    gdf: gpd.GeoDataFrame,
+    *,
+    color: str,
+    linewidth: float,
+    alpha: float,
+    zorder: float,
+) -> None:
+    geoms = np.asarray(gdf.geometry.values)
+    linear = np.isin(shapely.get_type_id(geoms), (1, 2, 5))
+
+    add_lines(ax, geoms[linear], color=color, linewidth=linewidth, alpha=alpha, zorder=zorder)
+
+    # Stray areas / nodes (platforms, stations) keep the geopandas styling.
+    if not linear.all():
+        gdf[~linear].plot(ax=ax, color=color, linewidth=linewidth, alpha=alpha, zorder=zorder)
+
+
 def _plot_dotted_texture(
     ax,
     gdf: gpd.GeoDataFrame,
@@ -236,8 +270,8 @@ def _plot_dotted_texture(
     if gdf is None or len(gdf) == 0:
         return
 
-    xs: list[float] = []
-    ys: list[float] = []
+    xs: list[np.ndarray] = []
+    ys: list[np.ndarray] = []
 
     jitter = spacing_m * 0.22
 
@@ -255,16 +289,27 @@ def _plot_dotted_texture(
             if len(x_coords) == 0 or len(y_coords) == 0:
                 continue
 
-            for x in x_coords:
-                for y in y_coords:
-                    px = x + rng.uniform(-jitter, jitter)
-                    py = y + rng.uniform(-jitter, jitter)
-                    if poly.contains(Point(px, py)):
-                        xs.append(px)
-                        ys.append(py)
+            # One (px, py) jitter pair per grid node, drawn in the same
+            # x-major order as a nested loop, then one vectorized
+            # point-in-polygon test for the whole grid.
+            offsets = rng.uniform(-jitter, jitter, size=(len(x_coords), len(y_coords), 2))
+            px = x_coords[:, None] + offsets[..., 0]
+            py = y_coords[None, :] + offsets[..., 1]
+
+            inside = shapely.contains_xy(poly, px, py)
+            xs.append(px[inside])
+            ys.append(py[inside])
 
     if xs:
-        ax.scatter(xs, ys, s=dot_size, c=color, alpha=alpha, linewidths=0, zorder=zorder)
+        ax.scatter(
+            np.concatenate(xs),
+            np.concatenate(ys),
+            s=dot_size,
+            c=color,
+            alpha=alpha,
+            linewidths=0,
+            zorder=zorder,
+        )
 
 
 # =============================================================================
@@ -288,6 +333,7 @@ def render_map_building(
     network_type_draw: str = "drive",
     zoom: float = 0.6,
     min_building_area: float = 15.0,
+    use_cache: bool = True,
 ) -> MapLayerResult:
 
     print(">>> ENTER render_map_building")
@@ -306,10 +352,9 @@ def render_map_building(
     # Keep surface treatment style-specific so other building palettes stay unchanged.
     use_surface_texture = False
     texture_rng = np.random.default_rng(seed if seed is not None else 42)
-
-    if seed is not None:
-        np.random.seed(seed)
-        random.seed(seed)
+    # Local Generator instead of the legacy global RandomState: same
+    # reproducibility per seed, no shared state between concurrent renders.
+    color_rng = np.random.default_rng(seed)
 
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -325,430 +370,487 @@ def render_map_building(
 
     print(f">>> dist_m = {dist_m}")
 
-    # =============================================================================
-    # CENTER + CLIP
-    # =============================================================================
-
-    center = gpd.GeoDataFrame(
-        geometry=[Point(center_lon, center_lat)],
-        crs="EPSG:4326",
+    draw_green_layers = (not render_only_buildings) and (palette_name != "mono_black")
+    draw_tree_layers = draw_green_layers and (
+        palette_name not in {"luxury_gold", "midnight_blue"}
     )
 
-    center_p = ox.projection.project_gdf(center).geometry.iloc[0]
+    def _build_geometry():
 
-    minx = center_p.x - half_width_m
-    maxx = center_p.x + half_width_m
-    miny = center_p.y - half_height_m
-    maxy = center_p.y + half_height_m
+        # =========================================================================
+        # CENTER + CLIP
+        # =========================================================================
 
-    clip_rect = box(minx, miny, maxx, maxy)
+        frame = map_frame(center_lat, center_lon, half_width_m, half_height_m)
 
-    # =============================================================================
-    # ROADS
-    # =============================================================================
+        target_crs = frame.crs
+        # Every layer below is clipped against this one axis-aligned
+        # rectangle; clip_to_rect decides inside/outside from bounds alone.
+        clip_rect = frame.clip_rect
 
-    print(">>> Downloading roads...")
+        # =========================================================================
+        # FEATURE QUERY – MAXIMAL ZÖLD
+        # =========================================================================
 
-    G = ox.graph_from_point(
-        (center_lat, center_lon),
-        dist=dist_m,
-        network_type=network_type_draw,
-        simplify=True,
-    )
+        if render_only_buildings:
+            tags = {
+                "building": True,
+                "building:part": True,
+            }
+        else:
+            tags = {
 
-    edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
+                "building": True,
+                "building:part": True,
 
-    edges_p = ox.projection.project_gdf(edges)
+                "landuse": [
+                    "grass","meadow","farmland","orchard","forest",
+                    "allotments","garden","recreation_ground",
+                    "village_green","cemetery",
+                    "industrial","commercial","retail",
+                    "education"
+                ],
 
-    edges_p = gpd.clip(
-        edges_p,
-        gpd.GeoSeries([clip_rect], crs=edges_p.crs)
-    )
+                "leisure": [
+                    "park","garden","pitch","sports_centre","stadium",
+                    "nature_reserve","playground","dog_park"
+                ],
 
-    edges_p = edges_p[~edges_p.is_empty]
+                "natural": [
+                    "water","wood","scrub","grassland","wetland",
+                    "heath","fell","beach","sand"
+                ],
 
-    if "highway" in edges_p.columns:
+                "amenity": [
+                    "parking","grave_yard","school","college","university"
+                ],
 
-        edges_p["highway"] = edges_p["highway"].apply(
-            _normalize_highway_value
-        )
+                "place": ["square"],
 
-        edges_p["road_class"] = edges_p["highway"].apply(
-            _classify_road
-        )
+                "highway": ["pedestrian"],
+            }
 
-    else:
-        edges_p["road_class"] = "local"
+        # =========================================================================
+        # DOWNLOADS
+        # =========================================================================
 
-    bridges_p = gpd.GeoDataFrame(geometry=[], crs=edges_p.crs)
-    if "bridge" in edges_p.columns:
-        bridge_mask = edges_p["bridge"].apply(_is_truthy_bridge)
-        if bridge_mask.any():
-            bridges_p = edges_p[bridge_mask].copy()
-            bridges_p = bridges_p[
-                bridges_p.geom_type.isin(["LineString", "MultiLineString"])
-            ]
+        # The road graph and every feature layer are independent Overpass
+        # queries; they are queued on the process-wide Overpass slots.
+        print(">>> Downloading roads and features...")
 
-    print(">>> Roads ready")
+        def _features(layer_tags):
+            return ox.features_from_point(
+                (center_lat, center_lon),
+                tags=layer_tags,
+                dist=dist_m,
+            )
 
-    # =============================================================================
-    # FEATURE QUERY – MAXIMAL ZÖLD
-    # =============================================================================
+        def _coastline():
+            # Most areas have no coastline; report that as None.
+            try:
+                return _features({"natural": "coastline"})
+            except InsufficientResponseError:
+                return None
 
-    if render_only_buildings:
-        tags = {
-            "building": True,
-            "building:part": True,
+        futures = {
+            "graph": overpass_pool.submit(
+                ox.graph_from_point,
+                (center_lat, center_lon),
+                dist=dist_m,
+                network_type=network_type_draw,
+                simplify=True,
+            ),
+            "features": overpass_pool.submit(_features, tags),
         }
-    else:
-        tags = {
 
-            "building": True,
-            "building:part": True,
+        if not render_only_buildings:
+            futures.update({
+                "trees": overpass_pool.submit(_features, {"natural": "tree"}),
+                "waterway": overpass_pool.submit(_features, {"waterway": True}),
+                "railway": overpass_pool.submit(_features, {"railway": True}),
+                "paths": overpass_pool.submit(
+                    _features,
+                    {"highway": ["footway", "path", "track", "steps"]},
+                ),
+                "coast": overpass_pool.submit(_coastline),
+            })
 
-            "landuse": [
-                "grass","meadow","farmland","orchard","forest",
-                "allotments","garden","recreation_ground",
-                "village_green","cemetery",
-                "industrial","commercial","retail",
-                "education"
-            ],
+        downloads = overpass_results(futures)
 
-            "leisure": [
-                "park","garden","pitch","sports_centre","stadium",
-                "nature_reserve","playground","dog_park"
-            ],
+        # =========================================================================
+        # ROADS
+        # =========================================================================
 
-            "natural": [
-                "water","wood","scrub","grassland","wetland",
-                "heath","fell","beach","sand"
-            ],
+        G = downloads["graph"]
 
-            "amenity": [
-                "parking","grave_yard","school","college","university"
-            ],
+        edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
+        # Only the class and bridge tags are read below.
+        edges = edges[edges.columns.intersection(["highway", "bridge", "geometry"])]
 
-            "place": ["square"],
+        edges_p = frame.crop_wgs84(edges).to_crs(target_crs)
 
-            "highway": ["pedestrian"],
-        }
+        edges_p = clip_to_rect(edges_p, clip_rect)
 
-    print(">>> Downloading unified features...")
+        edges_p = edges_p[~edges_p.is_empty]
 
-    gdf_all = ox.features_from_point(
-        (center_lat, center_lon),
-        tags=tags,
-        dist=dist_m,
-    )
+        if "highway" in edges_p.columns:
 
-    gdf_all = gdf_all[gdf_all.geometry.notnull()]
+            edges_p["highway"] = edges_p["highway"].apply(
+                _normalize_highway_value
+            )
 
-    gdf_all_p = ox.projection.project_gdf(gdf_all)
+            # One dict lookup over the column instead of a Python call per edge.
+            edges_p["road_class"] = edges_p["highway"].map(_ROAD_CLASS).fillna("local")
 
-    gdf_all_p = gdf_all_p[
-        gdf_all_p.geom_type.isin(["Polygon", "MultiPolygon"])
-    ]
+        else:
+            edges_p["road_class"] = "local"
+
+        bridges_p = gpd.GeoDataFrame(geometry=[], crs=edges_p.crs)
+        if "bridge" in edges_p.columns:
+            bridge_mask = edges_p["bridge"].apply(_is_truthy_bridge)
+            if bridge_mask.any():
+                # One boolean filter; the subset is never written to, so
+                # no defensive deep copy is needed.
+                bridges_p = edges_p[
+                    bridge_mask
+                    & edges_p.geom_type.isin(["LineString", "MultiLineString"])
+                ]
 
-    gdf_all_p = gpd.clip(
-        gdf_all_p,
-        gpd.GeoSeries([clip_rect], crs=gdf_all_p.crs),
-    )
+        print(">>> Roads ready")
 
-    # =============================================================================
-    # TREES
-    # =============================================================================
+        # =========================================================================
+        # FEATURES
+        # =========================================================================
 
-    trees_p = None
-    draw_green_layers = (not render_only_buildings) and (palette_name != "mono_black")
-    draw_tree_layers = draw_green_layers and (
-        palette_name not in {"luxury_gold", "midnight_blue"}
-    )
+        gdf_all = downloads["features"]
 
-    if not render_only_buildings:
-        print (">>> Downloading trees...")
+        # Keep the tag columns the layer masks below read; the query
+        # returns dozens of sparse OSM tags that are never used.
+        gdf_all = gdf_all[
+            gdf_all.columns.intersection(list(tags) + ["geometry"])
+        ]
 
-        trees = ox.features_from_point (
-            (center_lat, center_lon),
-            tags={"natural": "tree"},
-            dist=dist_m,
-        )
+        gdf_all = gdf_all[gdf_all.geometry.notnull()]
 
-        trees = trees [trees.geometry.notnull ()]
+        gdf_all_p = gdf_all.to_crs(target_crs)
 
-        trees_p = ox.projection.project_gdf (trees)
+        gdf_all_p = gdf_all_p[
+            gdf_all_p.geom_type.isin(["Polygon", "MultiPolygon"])
+        ]
 
-        trees_p = gpd.clip (
-            trees_p,
-            gpd.GeoSeries ([clip_rect], crs=trees_p.crs),
-        )
+        gdf_all_p = clip_to_rect(gdf_all_p, clip_rect)
 
-    # =============================================================================
-    # WATERWAYS
-    # =============================================================================
+        # =========================================================================
+        # TREES
+        # =========================================================================
 
-    waterway_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
-    if not render_only_buildings:
-        print(">>> Downloading waterways...")
+        trees_p = None
 
-        waterway = ox.features_from_point(
-            (center_lat, center_lon),
-            tags={"waterway": True},
-            dist=dist_m,
-        )
+        if not render_only_buildings:
+            trees = downloads["trees"]
 
-        waterway = waterway[waterway.geometry.notnull()]
+            trees = trees [["geometry"]]
+            trees = trees [trees.geometry.notnull ()]
 
-        waterway_p = ox.projection.project_gdf(waterway)
+            trees_p = trees.to_crs(target_crs)
 
-        waterway_p = gpd.clip(
-            waterway_p,
-            gpd.GeoSeries([clip_rect], crs=waterway_p.crs),
-        )
+            trees_p = clip_to_rect(trees_p, clip_rect)
 
-        waterway_p = waterway_p[~waterway_p.is_empty]
+        # =========================================================================
+        # WATERWAYS
+        # =========================================================================
 
-        if len(waterway_p) > 0:
+        waterway_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
+        if not render_only_buildings:
+            waterway = downloads["waterway"]
 
-            width_map = {
-                "river": 4,
-                "stream": 2,
-                "ditch": 1,
-                "canal": 3,
-            }
+            waterway = waterway[waterway.columns.intersection(["waterway", "geometry"])]
+            waterway = waterway[waterway.geometry.notnull()]
 
-            if "waterway" in waterway_p.columns:
+            waterway_p = waterway.to_crs(target_crs)
 
-                waterway_p["width"] = waterway_p["waterway"].map(width_map).fillna(1.5)
+            waterway_p = clip_to_rect(waterway_p, clip_rect)
 
-                waterway_p["geometry"] = waterway_p.apply(
-                    lambda r: r.geometry.buffer(r.width),
-                    axis=1,
-                )
+            waterway_p = waterway_p[~waterway_p.is_empty]
 
-    # =============================================================================
-    # RAILWAY
-    # =============================================================================
+            if len(waterway_p) > 0:
 
-    railway_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
-    if not render_only_buildings:
-        print (">>> Downloading railways...")
+                width_map = {
+                    "river": 4,
+                    "stream": 2,
+                    "ditch": 1,
+                    "canal": 3,
+                }
 
-        railway = ox.features_from_point (
-            (center_lat, center_lon),
-            tags={"railway": True},
-            dist=dist_m,
-        )
+                if "waterway" in waterway_p.columns:
 
-        railway = railway [railway.geometry.notnull ()]
+                    widths = waterway_p["waterway"].map(width_map).fillna(1.5)
 
-        railway_p = ox.projection.project_gdf (railway)
+                    # Per-row widths go to GEOS in one vectorized buffer
+                    # call instead of a row-wise apply.
+                    waterway_p = waterway_p.assign(
+                        width=widths,
+                        geometry=shapely.buffer(
+                            np.asarray(waterway_p.geometry.values),
+                            widths.to_numpy(dtype=float),
+                        ),
+                    )
 
-        railway_p = gpd.clip (
-            railway_p,
-            gpd.GeoSeries ([clip_rect], crs=railway_p.crs),
-        )
+        # =========================================================================
+        # RAILWAY
+        # =========================================================================
 
-        railway_p = railway_p [~railway_p.is_empty]
+        railway_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
+        if not render_only_buildings:
+            railway = downloads["railway"]
 
-    # =============================================================================
-    # PATHS (parks / cemeteries / forests)
-    # =============================================================================
+            # The railway tag drives the mainline filter below.
+            railway = railway [railway.columns.intersection(["railway", "geometry"])]
+            railway = railway [railway.geometry.notnull ()]
 
-    paths_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
-    if not render_only_buildings:
-        print (">>> Downloading paths...")
-
-        paths = ox.features_from_point (
-            (center_lat, center_lon),
-            tags={
-                "highway": [
-                    "footway",
-                    "path",
-                    "track",
-                    "steps"
-                ]
-            },
-            dist=dist_m,
-        )
+            railway_p = railway.to_crs(target_crs)
 
-        paths = paths [paths.geometry.notnull ()]
+            railway_p = clip_to_rect(railway_p, clip_rect)
 
-        paths_p = ox.projection.project_gdf (paths)
+            railway_p = railway_p [~railway_p.is_empty]
 
-        paths_p = gpd.clip (
-            paths_p,
-            gpd.GeoSeries ([clip_rect], crs=paths_p.crs),
-        )
+        # =========================================================================
+        # PATHS (parks / cemeteries / forests)
+        # =========================================================================
 
-        paths_p = paths_p [~paths_p.is_empty]
+        paths_p = gpd.GeoDataFrame(geometry=[], crs=gdf_all_p.crs)
+        if not render_only_buildings:
+            paths = downloads["paths"]
 
-    # =============================================================================
-    # SAFE COLUMN ACCESS
-    # =============================================================================
+            paths = paths [["geometry"]]
+            paths = paths [paths.geometry.notnull ()]
 
-    building = col(gdf_all_p, "building")
-    building_part = col(gdf_all_p, "building:part")
+            paths_p = paths.to_crs(target_crs)
 
-    landuse = col(gdf_all_p, "landuse")
-    leisure = col(gdf_all_p, "leisure")
-    natural = col(gdf_all_p, "natural")
-    amenity = col(gdf_all_p, "amenity")
-    place = col(gdf_all_p, "place")
-    highway = col(gdf_all_p, "highway")
+            paths_p = clip_to_rect(paths_p, clip_rect)
 
-    # =============================================================================
-    # BUILDINGS
-    # =============================================================================
+            paths_p = paths_p [~paths_p.is_empty]
 
-    building_mask = False
+        # =========================================================================
+        # SAFE COLUMN ACCESS
+        # =========================================================================
 
-    if building is not None:
-        building_mask = building.notnull()
+        building = col(gdf_all_p, "building")
+        building_part = col(gdf_all_p, "building:part")
 
-    if building_part is not None:
-        building_mask = building_mask | building_part.notnull()
+        landuse = col(gdf_all_p, "landuse")
+        leisure = col(gdf_all_p, "leisure")
+        natural = col(gdf_all_p, "natural")
+        amenity = col(gdf_all_p, "amenity")
+        place = col(gdf_all_p, "place")
+        highway = col(gdf_all_p, "highway")
 
-    buildings_p = gdf_all_p[building_mask]
+        # =========================================================================
+        # BUILDINGS
+        # =========================================================================
 
-    buildings_p = buildings_p[
-        buildings_p.geometry.area > min_building_area
-    ]
+        building_mask = False
 
-    # =============================================================================
-    # GREEN AREAS
-    # =============================================================================
+        if building is not None:
+            building_mask = building.notnull()
 
-    greens_p = gdf_all_p[
+        if building_part is not None:
+            building_mask = building_mask | building_part.notnull()
 
-        (
-            (leisure.isin([
-                "park","garden","pitch","nature_reserve",
-                "playground","dog_park"
-            ]))
-            if leisure is not None else False
-        )
+        buildings_p = gdf_all_p[building_mask]
 
-        |
+        buildings_p = buildings_p[
+            buildings_p.geometry.area > min_building_area
+        ]
 
-        (
-            (landuse.isin([
-                "grass","meadow","farmland","orchard","forest",
-                "allotments","garden","recreation_ground",
-                "village_green"
-            ]))
-            if landuse is not None else False
-        )
+        # =========================================================================
+        # GREEN AREAS
+        # =========================================================================
 
-        |
+        greens_p = gdf_all_p[
 
-        (
-            (natural.isin([
-                "wood","scrub","grassland","wetland","heath","fell"
-            ]))
-            if natural is not None else False
-        )
-    ]
+            (
+                (leisure.isin([
+                    "park","garden","pitch","nature_reserve",
+                    "playground","dog_park"
+                ]))
+                if leisure is not None else False
+            )
 
+            |
 
-    # =============================================================================
-    # WATER POLYGONS
-    # =============================================================================
+            (
+                (landuse.isin([
+                    "grass","meadow","farmland","orchard","forest",
+                    "allotments","garden","recreation_ground",
+                    "village_green"
+                ]))
+                if landuse is not None else False
+            )
 
-    water_p = gdf_all_p[
-        (natural == "water") if natural is not None else False
-    ]
+            |
 
-    beach_p = gdf_all_p[
-        (natural.isin(["beach", "sand"])) if natural is not None else False
-    ]
+            (
+                (natural.isin([
+                    "wood","scrub","grassland","wetland","heath","fell"
+                ]))
+                if natural is not None else False
+            )
+        ]
 
-    squares_p = gdf_all_p[
-        ((place == "square") if place is not None else False)
-        |
-        ((highway == "pedestrian") if highway is not None else False)
-    ]
-    railway_p = railway_p[
-        railway_p.geom_type.isin(["LineString", "MultiLineString"])
-    ]
 
-    if len(railway_p) > 0 and "railway" in railway_p.columns:
-        railway_p = railway_p[railway_p["railway"].apply(_is_mainline_railway)]
+        # =========================================================================
+        # WATER POLYGONS
+        # =========================================================================
 
-    # =============================================================================
-    # COASTLINE (Balaton fix)
-    # =============================================================================
+        water_p = gdf_all_p[
+            (natural == "water") if natural is not None else False
+        ]
 
-    # =============================================================================
-    # COASTLINE (Balaton fix)
-    # =============================================================================
+        beach_p = gdf_all_p[
+            (natural.isin(["beach", "sand"])) if natural is not None else False
+        ]
 
-    coast_water = None
-    if not render_only_buildings:
-        print (">>> Downloading coastline...")
+        squares_p = gdf_all_p[
+            ((place == "square") if place is not None else False)
+            |
+            ((highway == "pedestrian") if highway is not None else False)
+        ]
+        railway_p = railway_p[
+            railway_p.geom_type.isin(["LineString", "MultiLineString"])
+        ]
 
-        try:
+        if len(railway_p) > 0 and "railway" in railway_p.columns:
+            railway_p = railway_p[railway_p["railway"].apply(_is_mainline_railway)]
 
-            coast = ox.features_from_point (
-                (center_lat, center_lon),
-                tags={"natural": "coastline"},
-                dist=dist_m,
-            )
+        # =========================================================================
+        # COASTLINE (Balaton fix)
+        # =========================================================================
 
-            coast = coast [coast.geometry.notnull ()]
+        # =========================================================================
+        # COASTLINE (Balaton fix)
+        # =========================================================================
 
-            if len (coast) > 0:
+        coast_water = None
+        if not render_only_buildings:
+            coast = downloads["coast"]
 
-                coast_p = ox.projection.project_gdf (coast)
+            if coast is None:
 
-                coast_p = gpd.clip (
-                    coast_p,
-                    gpd.GeoSeries ([clip_rect], crs=coast_p.crs),
-                )
+                print (">>> No coastline found in this area")
 
-                coast_lines = coast_p.geometry
+            else:
 
-                water_polygons = list (polygonize (coast_lines))
+                coast = coast [["geometry"]]
+                coast = coast [coast.geometry.notnull ()]
 
-                if len (water_polygons) > 0:
+                if len (coast) > 0:
 
-                    coast_water = gpd.GeoDataFrame (
-                        geometry=water_polygons,
-                        crs=coast_p.crs,
-                    )
+                    coast_p = coast.to_crs(target_crs)
 
-                    coast_water = gpd.clip (
-                        coast_water,
-                        gpd.GeoSeries ([clip_rect], crs=coast_water.crs),
-                    )
+                    coast_p = clip_to_rect(coast_p, clip_rect)
 
-        except InsufficientResponseError:
+                    coast_lines = coast_p.geometry
 
-            print (">>> No coastline found in this area")
+                    water_polygons = shapely.get_parts(
+                        shapely.polygonize(np.asarray(coast_lines.values))
+                    )
+                    # Only faces touching the frame survive the clip below;
+                    # clip_rect is prepared, so this is one vectorized probe.
+                    water_polygons = water_polygons[
+                        shapely.intersects(water_polygons, clip_rect)
+                    ]
+
+                    # Clip every face in one call and keep only areal
+                    # results (Polygon / MultiPolygon).
+                    water_polygons = shapely.intersection(water_polygons, clip_rect)
+                    water_polygons = water_polygons[
+                        ~shapely.is_empty(water_polygons)
+                        & np.isin(shapely.get_type_id(water_polygons), (3, 6))
+                    ]
+
+                    if len (water_polygons) > 0:
+
+                        coast_water = gpd.GeoDataFrame (
+                            geometry=water_polygons,
+                            crs=coast_p.crs,
+                        )
+
+        # =========================================================================
+        # EXTRA AREAS
+        # =========================================================================
+
+        cemetery_p = gdf_all_p[
+            (
+                (landuse == "cemetery") if landuse is not None else False
+            )
+            |
+            (
+                (amenity == "grave_yard") if amenity is not None else False
+            )
+        ]
 
-    # =============================================================================
-    # EXTRA AREAS
-    # =============================================================================
+        parking_p = gdf_all_p[
+            (amenity == "parking") if amenity is not None else False
+        ]
 
-    cemetery_p = gdf_all_p[
-        (
-            (landuse == "cemetery") if landuse is not None else False
-        )
-        |
-        (
-            (amenity == "grave_yard") if amenity is not None else False
-        )
-    ]
+        industrial_p = gdf_all_p[
+            (
+                (landuse.isin(["industrial","commercial","retail"]))
+                if landuse is not None else False
+            )
+        ]
 
-    parking_p = gdf_all_p[
-        (amenity == "parking") if amenity is not None else False
-    ]
+        return {
+            "roads": edges_p,
+            "bridges": bridges_p,
+            "railway": railway_p,
+            "paths": paths_p,
+            "trees": trees_p,
+            "buildings": buildings_p,
+            "greens": greens_p,
+            "water": water_p,
+            "coast_water": coast_water,
+            "beach": beach_p,
+            "squares": squares_p,
+            "cemetery": cemetery_p,
+            "parking": parking_p,
+            "industrial": industrial_p,
+            "bounds": frame.bounds,
+        }
 
-    industrial_p = gdf_all_p[
-        (
-            (landuse.isin(["industrial","commercial","retail"]))
-            if landuse is not None else False
+    if use_cache:
+        geometry_data = load_or_build_geometry(
+            cache_prefix="building_v1",
+            center_lat=center_lat,
+            center_lon=center_lon,
+            extent_m=spec.extent_m,
+            cache_variant=(
+                f"{half_width_m:.2f}x{half_height_m:.2f}_"
+                f"{network_type_draw}_{min_building_area:g}"
+            ),
+            builder_func=_build_geometry,
         )
-    ]
+    else:
+        print("[CACHE] Disabled: rebuilding geometry")
+        geometry_data = _build_geometry()
+
+    edges_p = geometry_data["roads"]
+    bridges_p = geometry_data["bridges"]
+    railway_p = geometry_data["railway"]
+    paths_p = geometry_data["paths"]
+    trees_p = geometry_data["trees"]
+    buildings_p = geometry_data["buildings"]
+    greens_p = geometry_data["greens"]
+    water_p = geometry_data["water"]
+    coast_water = geometry_data["coast_water"]
+    beach_p = geometry_data["beach"]
+    squares_p = geometry_data["squares"]
+    cemetery_p = geometry_data["cemetery"]
+    parking_p = geometry_data["parking"]
+    industrial_p = geometry_data["industrial"]
+
+    minx, maxx, miny, maxy = geometry_data["bounds"]
 
     # =============================================================================
     # PLOT
@@ -759,6 +861,11 @@ def render_map_building(
     fig.patch.set_facecolor(style_cfg.background)
     ax.set_facecolor(style_cfg.background)
 
+    # Everything under the roads (area fills, textures, footprints) is
+    # written to the SVG as one embedded image at spec.dpi; roads, railway
+    # and bridges (zorder >= 10) stay vector.
+    ax.set_rasterization_zorder(6)
+
     if not render_only_buildings:
         if palette_name == "midnight_blue":
             beach_color = "#2A374A"
@@ -778,11 +885,12 @@ def render_map_building(
 
         # water
         if len(water_p) > 0:
-            water_p.plot(
-                ax=ax,
-                color=style_cfg.water,
-                edgecolor=style_cfg.water_edge,
-                linewidth=style_cfg.water_edge_width,
+            add_polygons(
+                ax,
+                water_p.geometry.values,
+                facecolor=style_cfg.water,
+                edgecolors=style_cfg.water_edge,
+                linewidths=style_cfg.water_edge_width,
                 zorder=1,
             )
             if use_surface_texture:
@@ -802,11 +910,12 @@ def render_map_building(
 
         # coastline water (Balaton)
         if coast_water is not None and len (coast_water) > 0:
-            coast_water.plot (
-                ax=ax,
-                color=style_cfg.water,
-                edgecolor=style_cfg.water_edge,
-                linewidth=style_cfg.water_edge_width,
+            add_polygons(
+                ax,
+                coast_water.geometry.values,
+                facecolor=style_cfg.water,
+                edgecolors=style_cfg.water_edge,
+                linewidths=style_cfg.water_edge_width,
                 zorder=0,
             )
             if use_surface_texture:
@@ -822,19 +931,19 @@ def render_map_building(
                 )
 
         if len(beach_p) > 0:
-            beach_p.plot(
-                ax=ax,
-                color=beach_color,
-                edgecolor=beach_edge,
-                linewidth=0,
+            add_polygons(
+                ax,
+                beach_p.geometry.values,
+                facecolor=beach_color,
+                edgecolors=beach_edge,
                 zorder=1.7,
             )
 
         if len(squares_p) > 0:
-            squares_p.plot(
-                ax=ax,
-                color="#D9CDB2" if use_surface_texture else style_cfg.background,
-                edgecolor="none",
+            add_polygons(
+                ax,
+                squares_p.geometry.values,
+                facecolor="#D9CDB2" if use_surface_texture else style_cfg.background,
                 zorder=1.9,
             )
             if use_surface_texture:
@@ -851,11 +960,12 @@ def render_map_building(
 
         # greens
         if draw_green_layers and len (greens_p) > 0:
-            greens_p.plot (
-                ax=ax,
-                color=style_cfg.green,
-                edgecolor=style_cfg.green_edge,
-                linewidth=style_cfg.green_edge_width,
+            add_polygons(
+                ax,
+                greens_p.geometry.values,
+                facecolor=style_cfg.green,
+                edgecolors=style_cfg.green_edge,
+                linewidths=style_cfg.green_edge_width,
                 zorder=2,
             )
             if use_surface_texture:
@@ -872,10 +982,16 @@ def render_map_building(
 
         # trees
         if draw_tree_layers and len (trees_p) > 0:
-            trees_p.plot (
-                ax=ax,
+            # Plain points: one direct scatter, no geopandas plot stack.
+            tree_geoms = np.asarray(trees_p.geometry.values)
+            tree_xy = shapely.get_coordinates(
+                tree_geoms[shapely.get_type_id(tree_geoms) == 0]
+            )
+            ax.scatter(
+                tree_xy[:, 0],
+                tree_xy[:, 1],
+                s=6,
                 color="#4F6D4F",
-                markersize=6,
                 marker="o",
                 alpha=0.7,
                 zorder=4,
@@ -885,17 +1001,14 @@ def render_map_building(
         if len (paths_p) > 0:
             paths_to_plot = paths_p
             if palette_name == "midnight_blue":
-                green_masks = []
-                if len(greens_p) > 0:
-                    green_masks.append(unary_union(greens_p.geometry))
-                if len(cemetery_p) > 0:
-                    green_masks.append(unary_union(cemetery_p.geometry))
-                if len(green_masks) > 0:
-                    combined_green_mask = unary_union(green_masks)
-                    paths_to_plot = gpd.clip(
-                        paths_p,
-                        gpd.GeoSeries([combined_green_mask], crs=paths_p.crs),
-                    )
+                # One C-level union over both layers' geometry arrays.
+                green_geoms = np.concatenate([
+                    np.asarray(greens_p.geometry.values),
+                    np.asarray(cemetery_p.geometry.values),
+                ])
+                if len(green_geoms) > 0:
+                    combined_green_mask = shapely.union_all(green_geoms)
+                    paths_to_plot = gpd.clip(paths_p, combined_green_mask)
 
             path_color = "#6F6F6F"
             path_width = 0.9
@@ -913,8 +1026,9 @@ def render_map_building(
                 path_zorder = 4
 
             if len(paths_to_plot) > 0:
-                paths_to_plot.plot (
-                    ax=ax,
+                _plot_line_layer(
+                    ax,
+                    paths_to_plot,
                     color=path_color,
                     linewidth=path_width,
                     alpha=path_alpha,
@@ -924,48 +1038,41 @@ def render_map_building(
         # extra
         # cemetery
         if draw_green_layers and len (cemetery_p) > 0:
-            cemetery_p.plot (
-                ax=ax,
-                color=style_cfg.green,
-                edgecolor=style_cfg.green_edge,
-                linewidth=style_cfg.green_edge_width,
+            add_polygons(
+                ax,
+                cemetery_p.geometry.values,
+                facecolor=style_cfg.green,
+                edgecolors=style_cfg.green_edge,
+                linewidths=style_cfg.green_edge_width,
                 zorder=2,
             )
 
         if len(parking_p) > 0:
-            parking_p.plot(ax=ax, color=parking_color, edgecolor="none", zorder=3)
+            add_polygons(ax, parking_p.geometry.values, facecolor=parking_color, zorder=3)
 
         if len(industrial_p) > 0:
-            industrial_p.plot(ax=ax, color=industrial_color, edgecolor="none", zorder=3)
+            add_polygons(ax, industrial_p.geometry.values, facecolor=industrial_color, zorder=3)
 
     # buildings
     if len(buildings_p) > 0:
 
-        palette = style_cfg.building_colors
-
-        base_weights = [0.34, 0.28, 0.15, 0.12, 0.08, 0.03]
-        if len(palette) == len(base_weights):
-            weights = base_weights
-        elif len(palette) < len(base_weights):
-            # Keep the intended front-loaded distribution and renormalize.
-            sliced = base_weights[: len(palette)]
-            total = sum(sliced)
-            weights = [w / total for w in sliced]
-        else:
-            # Fallback for longer custom palettes.
-            weights = None
+        # Palette parsed to RGBA once; each footprint gathers its row by
+        # index instead of matplotlib parsing one hex string per polygon.
+        palette_rgba = mcolors.to_rgba_array(style_cfg.building_colors)
+        cdf = _building_color_cdf(len(palette_rgba))
 
-        building_colors = np.random.choice(
-            palette,
-            size=len(buildings_p),
-            p=weights,
-        )
+        # Same draw as rng.choice(p=...), without its per-call
+        # validation: cumulative weights + one searchsorted lookup.
+        building_colors = palette_rgba[
+            np.searchsorted(cdf, color_rng.random(len(buildings_p)), side="right")
+        ]
 
-        buildings_p.plot(
-            ax=ax,
-            color=building_colors,
-            edgecolor=style_cfg.building_edge,
-            linewidth=style_cfg.building_edge_width,
+        add_polygons(
+            ax,
+            buildings_p.geometry.values,
+            facecolor=building_colors,
+            edgecolors=style_cfg.building_edge,
+            linewidths=style_cfg.building_edge_width,
             zorder=5,
         )
 
@@ -983,29 +1090,25 @@ def render_map_building(
     )
 
     if draw_transport_layers:
-        # roads
-        road_width_base = style_cfg.road_style.base_width
-        multipliers = style_cfg.road_style.multipliers
-
-        for cls, mult in multipliers.items():
-
-            subset = edges_p[edges_p["road_class"] == cls]
-
-            if len(subset) > 0:
-
-                subset.plot(
-                    ax=ax,
-                    color=style_cfg.road,
-                    linewidth=road_width_base * mult,
-                    capstyle="round",
-                    joinstyle="round",
-                    zorder=10,
-                )
+        # roads: one collection, per-edge width from the road class
+        road_widths = edges_p["road_class"].map(style_cfg.road_style.widths)
+        drawn = road_widths.notna().to_numpy()
+
+        add_lines(
+            ax,
+            edges_p.geometry.values[drawn],
+            color=style_cfg.road,
+            linewidth=road_widths.to_numpy(dtype=float)[drawn],
+            capstyle="round",
+            joinstyle="round",
+            zorder=10,
+        )
 
     # railway: keep visible in all building styles, even when roads are hidden.
     if (not render_only_buildings) and len(railway_p) > 0:
-        railway_p.plot(
-            ax=ax,
+        _plot_line_layer(
+            ax,
+            railway_p,
             color="#B8B8B8",
             linewidth=1.2,
             alpha=0.75,
@@ -1020,36 +1123,34 @@ def render_map_building(
             draw_transport_layers=draw_transport_layers,
         )
         road_width_base = style_cfg.road_style.base_width
-        multipliers = style_cfg.road_style.multipliers
 
         if "road_class" in bridges_p.columns:
-            for cls, mult in multipliers.items():
-                subset = bridges_p[bridges_p["road_class"] == cls]
-                if len(subset) == 0:
-                    continue
-
-                subset.plot(
-                    ax=ax,
-                    color=bridge_color,
-                    linewidth=max(0.85, road_width_base * mult * 1.22 * 0.60),
-                    capstyle="round",
-                    joinstyle="round",
-                    alpha=0.96,
-                    zorder=12,
-                )
+            # One collection, per-bridge width from its road class.
+            bridge_widths = bridges_p["road_class"].map({
+                cls: max(0.85, width * 1.22 * 0.60)
+                for cls, width in style_cfg.road_style.widths.items()
+            })
+            drawn = bridge_widths.notna().to_numpy()
+            bridge_geoms = bridges_p.geometry.values[drawn]
+            bridge_linewidth = bridge_widths.to_numpy(dtype=float)[drawn]
         else:
-            bridges_p.plot(
-                ax=ax,
-                color=bridge_color,
-                linewidth=max(0.85, road_width_base * 1.8 * 0.60),
-                capstyle="round",
-                joinstyle="round",
-                alpha=0.96,
-                zorder=12,
-            )
+            bridge_geoms = bridges_p.geometry.values
+            bridge_linewidth = max(0.85, road_width_base * 1.8 * 0.60)
+
+        add_lines(
+            ax,
+            bridge_geoms,
+            color=bridge_color,
+            linewidth=bridge_linewidth,
+            capstyle="round",
+            joinstyle="round",
+            alpha=0.96,
+            zorder=12,
+        )
 
     ax.set_xlim(minx, maxx)
     ax.set_ylim(miny, maxy)
+    ax.set_aspect("equal")
     ax.set_axis_off()
     ax.set_position([0, 0, 1, 1])
 
@@ -13,8 +13,10 @@ import numpy as np
 import osmnx as ox
 import random
 
-from shapely.geometry import Point, box
-
+from generator.core.cache import load_or_build_geometry
+from generator.core.geometry import add_lines, add_polygons, clip_to_rect, map_frame
+from generator.core.overpass import overpass_pool, overpass_results
+from generator.core.roads import classify_road
 from generator.specs import ProductSpec
 from generator.styles import get_style_config, LineStyleConfig
 
@@ -32,16 +34,42 @@ class MapLayerResult:
 # HELPERS
 # ---------------------------------------------------------------------------
 
-def _classify_road(hw: str) -> str:
-    hw = str(hw)
+def _fetch_water(clip_wgs) -> gpd.GeoDataFrame:
+    try:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "natural": ["water", "bay", "strait"],
+                "water": True,
+                "waterway": ["riverbank", "canal"],
+                "landuse": ["basin", "reservoir"],
+            },
+        )
+    except Exception:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "natural": "water",
+                "waterway": "riverbank",
+            },
+        )
 
-    if hw in {"motorway", "trunk"}:
-        return "highway"
-    if hw in {"primary", "secondary", "tertiary"}:
-        return "arterial"
-    if hw in {"residential", "unclassified", "living_street"}:
-        return "local"
-    return "minor"
+
+def _fetch_green(clip_wgs) -> gpd.GeoDataFrame:
+    try:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={
+                "leisure": ["park", "garden", "nature_reserve", "recreation_ground", "village_green"],
+                "landuse": ["forest", "grass", "meadow", "recreation_ground", "village_green"],
+                "natural": ["wood", "grassland", "scrub", "heath"],
+            },
+        )
+    except Exception:
+        return ox.features_from_polygon(
+            clip_wgs,
+            tags={"leisure": "park"},
+        )
 
 
 def _prepare_polygon_layer(raw_layer: gpd.GeoDataFrame | None, target_crs, clip_rect) -> gpd.GeoDataFrame:
@@ -52,12 +80,12 @@ def _prepare_polygon_layer(raw_layer: gpd.GeoDataFrame | None, target_crs, clip_
     if len(layer) == 0:
         return gpd.GeoDataFrame(geometry=[], crs=target_crs)
 
-    layer_p = layer.to_crs(target_crs)
+    layer_p = layer[["geometry"]].to_crs(target_crs)
     layer_p = layer_p[layer_p.geom_type.isin(["Polygon", "MultiPolygon"])]
     if len(layer_p) == 0:
         return gpd.GeoDataFrame(geometry=[], crs=target_crs)
 
-    return gpd.clip(layer_p, gpd.GeoSeries([clip_rect], crs=target_crs))
+    return clip_to_rect(layer_p, clip_rect)
 
 
 # ---------------------------------------------------------------------------
@@ -78,6 +106,7 @@ def render_map_line(
     seed: Optional[int] = 42,
     filename_prefix: str = "map_layer_line",
     preview_mode: bool = False,
+    use_cache: bool = True,
 ) -> MapLayerResult:
 
     style_cfg = get_style_config(palette_name)
@@ -99,102 +128,97 @@ def render_map_line(
 
     dist_m = int(np.ceil((half_width_m**2 + half_height_m**2) ** 0.5)) + 300
 
-    # -----------------------------------------------------------------------
-    # CENTER + CLIP
-    # -----------------------------------------------------------------------
-
-    center = gpd.GeoDataFrame(
-        geometry=[Point(center_lon, center_lat)],
-        crs="EPSG:4326",
-    )
-
-    center_p = ox.projection.project_gdf(center).geometry.iloc[0]
-
-    minx = center_p.x - half_width_m
-    maxx = center_p.x + half_width_m
-    miny = center_p.y - half_height_m
-    maxy = center_p.y + half_height_m
-    clip_rect = box(minx, miny, maxx, maxy)
-
-    # -----------------------------------------------------------------------
-    # ADAPTIVE DETAIL FILTER
-    # -----------------------------------------------------------------------
-
-    if extent_m <= 1500:
-        custom_filter = (
-            '["highway"~"motorway|trunk|primary|secondary|tertiary|'
-            'residential|living_street|service|pedestrian|cycleway|footway"]'
-        )
-    elif extent_m <= 3000:
-        custom_filter = (
-            '["highway"~"motorway|trunk|primary|secondary|tertiary|'
-            'residential|living_street|service|cycleway"]'
-        )
-    else:
-        custom_filter = (
-            '["highway"~"motorway|trunk|primary|secondary|tertiary"]'
-        )
+    def _build_geometry():
 
-    # -----------------------------------------------------------------------
-    # GRAPH DOWNLOAD
-    # -----------------------------------------------------------------------
+        # -------------------------------------------------------------------
+        # CENTER + CLIP
+        # -------------------------------------------------------------------
 
-    G = ox.graph_from_point(
-        (center_lat, center_lon),
-        dist=dist_m,
-        custom_filter=custom_filter,
-        simplify=True,
-    )
+        frame = map_frame(center_lat, center_lon, half_width_m, half_height_m)
 
-    edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
-    edges_p = ox.projection.project_gdf(edges)
-    edges_p = gpd.clip(edges_p, gpd.GeoSeries([clip_rect], crs=edges_p.crs))
-    edges_p = edges_p[~edges_p.is_empty]
+        target_crs = frame.crs
+        clip_rect = frame.clip_rect
+        clip_wgs = frame.clip_wgs
 
-    clip_gdf = gpd.GeoDataFrame(geometry=[clip_rect], crs=edges_p.crs)
-    clip_wgs = clip_gdf.to_crs("EPSG:4326").geometry.iloc[0]
+        # -------------------------------------------------------------------
+        # ADAPTIVE DETAIL FILTER
+        # -------------------------------------------------------------------
 
-    try:
-        water_raw = ox.features_from_polygon(
-            clip_wgs,
-            tags={
-                "natural": ["water", "bay", "strait"],
-                "water": True,
-                "waterway": ["riverbank", "canal"],
-                "landuse": ["basin", "reservoir"],
-            },
-        )
-    except Exception:
-        water_raw = ox.features_from_polygon(
-            clip_wgs,
-            tags={
-                "natural": "water",
-                "waterway": "riverbank",
-            },
-        )
+        if extent_m <= 1500:
+            custom_filter = (
+                '["highway"~"motorway|trunk|primary|secondary|tertiary|'
+                'residential|living_street|service|pedestrian|cycleway|footway"]'
+            )
+        elif extent_m <= 3000:
+            custom_filter = (
+                '["highway"~"motorway|trunk|primary|secondary|tertiary|'
+                'residential|living_street|service|cycleway"]'
+            )
+        else:
+            custom_filter = (
+                '["highway"~"motorway|trunk|primary|secondary|tertiary"]'
+            )
 
-    try:
-        green_raw = ox.features_from_polygon(
-            clip_wgs,
-            tags={
-                "leisure": ["park", "garden", "nature_reserve", "recreation_ground", "village_green"],
-                "landuse": ["forest", "grass", "meadow", "recreation_ground", "village_green"],
-                "natural": ["wood", "grassland", "scrub", "heath"],
-            },
-        )
-    except Exception:
-        green_raw = ox.features_from_polygon(
-            clip_wgs,
-            tags={"leisure": "park"},
+        # -------------------------------------------------------------------
+        # DOWNLOADS
+        # -------------------------------------------------------------------
+
+        # The graph and both feature layers are independent Overpass
+        # queries; they share the process-wide Overpass slots.
+        downloads = overpass_results({
+            "graph": overpass_pool.submit(
+                ox.graph_from_point,
+                (center_lat, center_lon),
+                dist=dist_m,
+                custom_filter=custom_filter,
+                simplify=True,
+            ),
+            "water": overpass_pool.submit(_fetch_water, clip_wgs),
+            "green": overpass_pool.submit(_fetch_green, clip_wgs),
+        })
+
+        G = downloads["graph"]
+        water_raw = downloads["water"]
+        green_raw = downloads["green"]
+
+        edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
+        edges = edges[edges.columns.intersection(["highway", "geometry"])]
+        edges_p = frame.crop_wgs84(edges).to_crs(target_crs)
+        edges_p = clip_to_rect(edges_p, clip_rect)
+
+        water_p = _prepare_polygon_layer(water_raw, edges_p.crs, clip_rect)
+        green_p = _prepare_polygon_layer(green_raw, edges_p.crs, clip_rect)
+
+        if "highway" in edges_p.columns:
+            edges_p["road_class"] = classify_road(edges_p["highway"])
+        else:
+            edges_p["road_class"] = "local"
+
+        return {
+            "roads": edges_p,
+            "water": water_p,
+            "green": green_p,
+            "bounds": frame.bounds,
+        }
+
+    if use_cache:
+        geometry_data = load_or_build_geometry(
+            cache_prefix="line_v1",
+            center_lat=center_lat,
+            center_lon=center_lon,
+            extent_m=extent_m,
+            cache_variant=f"{half_width_m:.2f}x{half_height_m:.2f}",
+            builder_func=_build_geometry,
         )
+    else:
+        print("[CACHE] Disabled: rebuilding geometry")
+        geometry_data = _build_geometry()
 
-    water_p = _prepare_polygon_layer(water_raw, edges_p.crs, clip_rect)
-    green_p = _prepare_polygon_layer(green_raw, edges_p.crs, clip_rect)
+    edges_p = geometry_data["roads"]
+    water_p = geometry_data["water"]
+    green_p = geometry_data["green"]
 
-    if "highway" in edges_p.columns:
-        edges_p["road_class"] = edges_p["highway"].apply(_classify_road)
-    else:
-        edges_p["road_class"] = "local"
+    minx, maxx, miny, maxy = geometry_data["bounds"]
 
     # -----------------------------------------------------------------------
     # PLOT
@@ -205,36 +229,35 @@ def render_map_line(
     ax.set_facecolor(style_cfg.background)
 
     if len(water_p) > 0:
-        water_p.plot(
-            ax=ax,
-            color=style_cfg.water,
-            edgecolor="none",
+        add_polygons(
+            ax,
+            water_p.geometry.values,
+            facecolor=style_cfg.water,
             zorder=1,
         )
 
     if len(green_p) > 0:
-        green_p.plot(
-            ax=ax,
-            color=style_cfg.green,
-            edgecolor="none",
+        add_polygons(
+            ax,
+            green_p.geometry.values,
+            facecolor=style_cfg.green,
             zorder=2,
         )
 
-    road_width_base = style_cfg.road_style.base_width
-    multipliers = style_cfg.road_style.multipliers
-
-    for cls, mult in multipliers.items():
-        subset = edges_p[edges_p["road_class"] == cls]
-        if len(subset) > 0:
-            subset.plot(
-                ax=ax,
-                color=style_cfg.road,
-                linewidth=road_width_base * mult,
-                zorder=12,
-            )
+    road_widths = edges_p["road_class"].map(style_cfg.road_style.widths)
+    drawn = road_widths.notna().to_numpy()
+
+    add_lines(
+        ax,
+        edges_p.geometry.values[drawn],
+        color=style_cfg.road,
+        linewidth=road_widths.to_numpy(dtype=float)[drawn],
+        zorder=12,
+    )
 
     ax.set_xlim(minx, maxx)
     ax.set_ylim(miny, maxy)
+    ax.set_aspect("equal")
     ax.set_axis_off()
     ax.set_position([0, 0, 1, 1])
 
@@ -4,16 +4,16 @@ from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
+import zlib
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
 from reportlab.lib import colors
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
 from reportlab.graphics import renderPDF
 
 from svglib.svglib import svg2rlg
 from generator.specs import ProductSpec
+from generator.layouts.layout_utils import _register_font_if_available
 
 
 # =============================================================================
@@ -58,20 +58,19 @@ def compose_layout_block(
 
     font_candidate = Path(font_path) if font_path else default_font_path
 
-    if font_candidate.exists():
-        pdfmetrics.registerFont(
-            TTFont("MonotonCustom", str(font_candidate))
-        )
-        title_font_name = "MonotonCustom"
+    # Registered fonts are kept per name, so a per-call override gets its
+    # own name; reusing "MonotonCustom" would keep the first TTF loaded.
+    if font_candidate == default_font_path:
+        title_font_key = "MonotonCustom"
     else:
-        title_font_name = "Helvetica"
+        title_font_key = f"MonotonCustom-{zlib.crc32(str(font_candidate.resolve()).encode()):08x}"
+
+    title_font_name = _register_font_if_available(title_font_key, font_candidate)
 
     # Register CentaureaDemo for subtitle and coordinates
     centaurea_path = project_root / "Fonts" / "CentaureaDemo.ttf"
     if centaurea_path.exists():
-        pdfmetrics.registerFont(
-            TTFont("CentaureaDemoCustom", str(centaurea_path))
-        )
+        _register_font_if_available("CentaureaDemoCustom", centaurea_path)
         subtitle_font_name = "CentaureaDemoCustom"
         coordinates_font_name = "CentaureaDemoCustom"
     else:
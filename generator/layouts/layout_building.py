@@ -8,12 +8,11 @@ from dataclasses import dataclass
 from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
 from reportlab.graphics import renderPDF
 from svglib.svglib import svg2rlg
 
 from generator.specs import ProductSpec
+from generator.layouts.layout_utils import _register_font_if_available
 
 
 # =============================================================================
@@ -102,22 +101,13 @@ def compose_layout_building(
     inter_path = project_root / "Fonts" / "Inter_18pt-ExtraLight.ttf"
     centaurea_path = project_root / "Fonts" / "CentaureaDemo.ttf"
 
-    pdfmetrics.registerFont (
-        TTFont ("CormorantSemiBold", str (cormorant_path))
-    )
-    pdfmetrics.registerFont (
-        TTFont ("InterExtraLight", str (inter_path))
-    )
-    
+    # The helper returns "Helvetica" for a missing TTF, so only names that
+    # were actually registered reach setFont.
+    title_font = _register_font_if_available ("CormorantSemiBold", cormorant_path)
+    subtitle_font = _register_font_if_available ("InterExtraLight", inter_path)
+
     if centaurea_path.exists():
-        pdfmetrics.registerFont (
-            TTFont ("CentaureaDemoCustom", str (centaurea_path))
-        )
-        subtitle_font = "CentaureaDemoCustom"
-    else:
-        subtitle_font = "InterExtraLight"
-
-    title_font = "CormorantSemiBold"
+        subtitle_font = _register_font_if_available ("CentaureaDemoCustom", centaurea_path)
 
     # Alsó margó teljes magassága
     bottom_margin_height = inner_y
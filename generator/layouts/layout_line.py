@@ -1,20 +1,16 @@
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
-import numpy as np
-from io import BytesIO
-from PIL import Image
 
 from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 from reportlab.graphics import renderPDF
-from reportlab.lib.utils import ImageReader
 from svglib.svglib import svg2rlg
 
 from generator.styles import get_style_config, LineStyleConfig
+from generator.layouts.layout_utils import _build_fade_image, _register_font_if_available
 
 
 def compose_layout_line(
@@ -93,23 +89,7 @@ def compose_layout_line(
     fade_ratio = 0.27
     fade_height = inner_h * fade_ratio
 
-    img_w = 1600
-    img_h = 2000
-
-    gradient = np.zeros((img_h, img_w, 4), dtype=np.uint8)
-
-    for y in range(img_h):
-        ratio = y / img_h
-        intensity = (ratio ** 2.2) * 1.15
-        alpha = int(min(intensity, 1.0) * 255)
-        gradient[y, :, 3] = alpha
-
-    img = Image.fromarray(gradient, mode="RGBA")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-
-    overlay = ImageReader(buffer)
+    overlay = _build_fade_image("#000000", img_h=2000, peak=1.15)
 
     c.drawImage(
         overlay,
@@ -131,9 +111,7 @@ def compose_layout_line(
     subtitle_font = "Helvetica"
 
     if montserrat_path.exists():
-        pdfmetrics.registerFont(
-            TTFont("MontserratBold", str(montserrat_path))
-        )
+        _register_font_if_available("MontserratBold", montserrat_path)
         title_font = "MontserratBold"
 
     c.setFillColor(colors.white)
@@ -196,11 +174,7 @@ def compose_layout_line(
     total_width = raw_width + (len(subtitle_text) - 1) * tracking
     start_x = inner_x + (inner_w - total_width) / 2
 
-    cursor = start_x
-    for ch in subtitle_text:
-        c.drawString(cursor, subtitle_y, ch)
-        w = pdfmetrics.stringWidth(ch, subtitle_font, subtitle_size)
-        cursor += w + tracking
+    c.drawString(start_x, subtitle_y, subtitle_text, charSpace=tracking)
 
     # ============================================================
     # DIVIDER LINES
@@ -4,6 +4,7 @@ from io import BytesIO
 import base64
 from copy import deepcopy
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from xml.etree import ElementTree as ET
@@ -229,6 +230,25 @@ def _append_svg_text(
     node.text = text
 
 
+def _fade_gradient_rgba(
+    color_hex: str,
+    *,
+    img_w: int,
+    img_h: int,
+    gamma: float = 2.2,
+    peak: float = 1.0,
+) -> np.ndarray:
+    """Solid-color RGBA strip whose alpha ramps from 0 (top) to 255 (bottom)."""
+    rgb = [int(color_hex.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4)]
+    t = np.arange(img_h, dtype=np.float64) / max(1, img_h - 1)
+    alpha = (np.minimum(1.0, (t ** gamma) * peak) * 255).astype(np.uint8)
+
+    gradient = np.empty((img_h, img_w, 4), dtype=np.uint8)
+    gradient[:, :, :3] = rgb
+    gradient[:, :, 3] = alpha[:, None]
+    return gradient
+
+
 def _append_passepartout(svg_root: ET.Element, layout: PosterLayout, color: str, bottom_fade: bool = False, fade_color: Optional[str] = None) -> None:
     overlay = ET.SubElement(svg_root, f"{{{SVG_NS}}}g", {"id": "passepartout-layer"})
     resolved_fade_color = fade_color or color
@@ -248,17 +268,7 @@ def _append_passepartout(svg_root: ET.Element, layout: PosterLayout, color: str,
     if bottom_fade:
         fade_height = layout.height_cm * 0.40
         fade_y = layout.height_cm - layout.bottom_margin_cm - fade_height
-        img_w = 32
-        img_h = 1200
-        rgb = tuple(int(resolved_fade_color.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4))
-        gradient = np.zeros((img_h, img_w, 4), dtype=np.uint8)
-        gradient[:, :, 0] = rgb[0]
-        gradient[:, :, 1] = rgb[1]
-        gradient[:, :, 2] = rgb[2]
-        for y in range(img_h):
-            t = y / max(1, img_h - 1)
-            alpha = int(min(1.0, t ** 2.2) * 255)
-            gradient[y, :, 3] = alpha
+        gradient = _fade_gradient_rgba(resolved_fade_color, img_w=32, img_h=1200)
 
         image = Image.fromarray(gradient, mode="RGBA")
         buffer = BytesIO()
@@ -559,6 +569,12 @@ def _append_block_engine_typography(
             })
 
 
+@lru_cache(maxsize=None)
+def _unit_text_width(text: str, font_path: str) -> float:
+    """Outline width of `text` as a size-1 TextPath; fixed per font."""
+    return TextPath((0, 0), text, prop=FontProperties(fname=font_path), size=1).get_extents().width
+
+
 def _append_line_engine_typography(
     svg_root: ET.Element,
     *,
@@ -622,9 +638,7 @@ def _append_line_engine_typography(
             })
 
             # Horizontal lines flanking the subtitle
-            spacer_path = TextPath((0, 0), "MMM", prop=FontProperties(fname=str(sub_font_path)), size=1)
-            spacer_bbox = spacer_path.get_extents()
-            gap_cm = max(sw * 0.06, spacer_bbox.width * s_scale)
+            gap_cm = max(sw * 0.06, _unit_text_width("MMM", str(sub_font_path)) * s_scale)
             edge_margin_cm = layout.width_cm * 0.06
             sub_svg_y = _svg_y_from_bottom(layout, cy)
             stroke_w = layout.height_cm * 0.0018
@@ -792,21 +806,33 @@ def _register_font_if_available(font_name: str, font_path: Optional[Path]) -> st
     return font_name
 
 
-def _build_fade_image(color_hex: str, img_w: int = 64, img_h: int = 1600) -> ImageReader:
-    rgb = tuple(int(color_hex.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4))
-    gradient = np.zeros((img_h, img_w, 4), dtype=np.uint8)
-    gradient[:, :, 0] = rgb[0]
-    gradient[:, :, 1] = rgb[1]
-    gradient[:, :, 2] = rgb[2]
-    for y in range(img_h):
-        t = y / max(1, img_h - 1)
-        alpha = int(min(1.0, t ** 2.2) * 255)
-        gradient[y, :, 3] = alpha
-    image = Image.fromarray(gradient, mode="RGBA")
-    buffer = BytesIO()
-    image.save(buffer, format="PNG")
-    buffer.seek(0)
-    return ImageReader(buffer)
+def _build_fade_image(
+    color_hex: str,
+    img_w: int = 1,
+    img_h: int = 1600,
+    gamma: float = 2.2,
+    peak: float = 1.0,
+) -> ImageReader:
+    # Alpha only varies vertically, so one column stretched by drawImage
+    # carries the full ramp; height keeps the ramp smooth on large prints.
+    gradient = _fade_gradient_rgba(color_hex, img_w=img_w, img_h=img_h, gamma=gamma, peak=peak)
+    # ImageReader takes the PIL image directly; no PNG encode/decode.
+    return ImageReader(Image.fromarray(gradient, mode="RGBA"))
+
+
+def _rasterize_svg(svg_path: Path, *, width_px: int, height_px: int) -> Optional[ImageReader]:
+    if cairosvg is None:
+        return None
+    try:
+        png_bytes = cairosvg.svg2png(
+            url=str(svg_path),
+            output_width=width_px,
+            output_height=height_px,
+        )
+    except Exception:
+        # Fallback when Cairo runtime libraries are unavailable.
+        return None
+    return ImageReader(BytesIO(png_bytes))
 
 
 def _compose_line_engine_pdf_bytes(
@@ -816,7 +842,14 @@ def _compose_line_engine_pdf_bytes(
     title: str,
     subtitle: str,
     theme: PosterTheme,
+    raster_map_dpi: Optional[int] = None,
 ) -> bytes:
+    """Line engine poster PDF.
+
+    With `raster_map_dpi` set, the map is embedded as one Cairo-rendered
+    bitmap instead of svglib vector paths (used when only the PNG preview
+    is produced). Falls back to the vector path when Cairo is unavailable.
+    """
     page_width_pt = layout.width_cm * cm
     page_height_pt = layout.height_cm * cm
     buffer = BytesIO()
@@ -825,18 +858,36 @@ def _compose_line_engine_pdf_bytes(
     pdf_canvas.setFillColor(colors.HexColor(theme.passepartout_color))
     pdf_canvas.rect(0, 0, page_width_pt, page_height_pt, fill=1, stroke=0)
 
-    drawing = svg2rlg(str(map_svg_path))
     map_width_pt = layout.map_box.width_cm * cm
     map_height_pt = layout.map_box.height_cm * cm
-    scale_x = map_width_pt / drawing.width
-    scale_y = map_height_pt / drawing.height
-    drawing.scale(scale_x, scale_y)
-    renderPDF.draw(
-        drawing,
-        pdf_canvas,
-        layout.map_box.x_cm * cm,
-        layout.map_box.y_cm * cm,
-    )
+
+    map_image = None
+    if raster_map_dpi is not None:
+        map_image = _rasterize_svg(
+            map_svg_path,
+            width_px=int(round(map_width_pt / 72 * raster_map_dpi)),
+            height_px=int(round(map_height_pt / 72 * raster_map_dpi)),
+        )
+
+    if map_image is not None:
+        pdf_canvas.drawImage(
+            map_image,
+            layout.map_box.x_cm * cm,
+            layout.map_box.y_cm * cm,
+            width=map_width_pt,
+            height=map_height_pt,
+        )
+    else:
+        drawing = svg2rlg(str(map_svg_path))
+        scale_x = map_width_pt / drawing.width
+        scale_y = map_height_pt / drawing.height
+        drawing.scale(scale_x, scale_y)
+        renderPDF.draw(
+            drawing,
+            pdf_canvas,
+            layout.map_box.x_cm * cm,
+            layout.map_box.y_cm * cm,
+        )
 
     fade_height_pt = layout.height_cm * 0.40 * cm
     fade_overlay = _build_fade_image(theme.bottom_fade_color or theme.passepartout_color)
@@ -971,6 +1022,9 @@ def compose_poster_outputs(
             title=title,
             subtitle=subtitle,
             theme=theme,
+            # PNG-only runs never ship the PDF, so a raster map is enough
+            # for the 96 dpi preview (2x for clean downsampling).
+            raster_map_dpi=None if export_pdf else 192,
         )
         if export_pdf:
             output_pdf = output_dir / f"{filename_prefix}.pdf"
@@ -66,7 +66,13 @@ class NebulaParams:
 
 # ------------------------- noise utils -------------------------
 
-def _value_noise(w: int, h: int, grid: int, rng: np.random.Generator) -> np.ndarray:
+def _value_noise(
+    w: int,
+    h: int,
+    grid: int,
+    rng: np.random.Generator,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
     gw = max(2, int(np.ceil(w / grid)) + 1)
     gh = max(2, int(np.ceil(h / grid)) + 1)
     base = rng.random((gh, gw), dtype=np.float32)
@@ -81,27 +87,33 @@ def _value_noise(w: int, h: int, grid: int, rng: np.random.Generator) -> np.ndar
     yi1 = np.clip(yi + 1, 0, gh - 1)
     xi1 = np.clip(xi + 1, 0, gw - 1)
 
-    n00 = base[yi[:, None], xi[None, :]]
-    n10 = base[yi1[:, None], xi[None, :]]
-    n01 = base[yi[:, None], xi1[None, :]]
-    n11 = base[yi1[:, None], xi1[None, :]]
-
-    nx0 = n00 * (1 - xf[None, :]) + n01 * xf[None, :]
-    nx1 = n10 * (1 - xf[None, :]) + n11 * xf[None, :]
-    nxy = nx0 * (1 - yf[:, None]) + nx1 * yf[:, None]
+    # Separable bilinear: interpolate along x on the small (gh, w) grid rows
+    # first, then blend whole rows along y. Same values as the four-corner
+    # gather, but only two full-size gathers and one full-size blend.
+    rows = base[:, xi] * (1 - xf[None, :]) + base[:, xi1] * xf[None, :]
+    nxy = rows[yi] * (1 - yf[:, None]) + rows[yi1] * yf[:, None]
 
     img = Image.fromarray(np.uint8(np.clip(nxy * 255, 0, 255)), mode="L")
     img = img.filter(ImageFilter.GaussianBlur(radius=max(0.0, grid * 0.08)))
-    return np.asarray(img, dtype=np.float32) / 255.0
+    if out is None:
+        return np.asarray(img, dtype=np.float32) / 255.0
+    out[...] = np.asarray(img)
+    out /= 255.0
+    return out
 
 
 def _fbm(w: int, h: int, rng: np.random.Generator, scales: Tuple[int, ...], weights: Tuple[float, ...]) -> np.ndarray:
     acc = np.zeros((h, w), dtype=np.float32)
+    # One scratch buffer serves every octave instead of a fresh array each.
+    scratch = np.empty((h, w), dtype=np.float32)
     wsum = 0.0
     for s, a in zip(scales, weights):
-        acc += a * _value_noise(w, h, s, rng)
+        _value_noise(w, h, s, rng, out=scratch)
+        scratch *= a
+        acc += scratch
         wsum += a
-    return acc / max(1e-6, wsum)
+    acc /= max(1e-6, wsum)
+    return acc
 
 
 def _smoothstep(x: np.ndarray) -> np.ndarray:
@@ -109,65 +121,73 @@ def _smoothstep(x: np.ndarray) -> np.ndarray:
     return x * x * (3.0 - 2.0 * x)
 
 
+def _smoothstep_range(x: np.ndarray, lo: float, width: float) -> np.ndarray:
+    """In-place _smoothstep(clip((x - lo) / width, 0, 1)); overwrites and returns `x`."""
+    x -= lo
+    x /= width
+    np.clip(x, 0.0, 1.0, out=x)
+    sq = x * x
+    x *= -2.0
+    x += 3.0
+    x *= sq
+    return x
+
+
 # ------------------------- color / texture -------------------------
 
 def _apply_ramp(gray: np.ndarray) -> Image.Image:
     g = np.clip(gray, 0.0, 1.0)
     stops = np.linspace(0.0, 1.0, len(DEFAULT_RAMP), dtype=np.float32)
+    ramp = np.asarray(DEFAULT_RAMP, dtype=np.float32) / 255.0
 
-    r = np.zeros_like(g)
-    gg = np.zeros_like(g)
-    b = np.zeros_like(g)
-
-    for i in range(len(DEFAULT_RAMP) - 1):
-        lo, hi = stops[i], stops[i + 1]
-        mask = (g >= lo) & (g <= hi)
-        if not np.any(mask):
-            continue
-        t = (g[mask] - lo) / (hi - lo + 1e-6)
-        c0 = np.array(DEFAULT_RAMP[i], dtype=np.float32) / 255.0
-        c1 = np.array(DEFAULT_RAMP[i + 1], dtype=np.float32) / 255.0
-        c = c0[None, :] * (1 - t[:, None]) + c1[None, :] * t[:, None]
-        r[mask], gg[mask], b[mask] = c[:, 0], c[:, 1], c[:, 2]
-
-    rgb = np.stack([r, gg, b], axis=-1)
+    # Segment per pixel in one pass; a value sitting exactly on an inner stop
+    # starts the upper segment, as the old per-segment overwrite did.
+    idx = np.clip(np.searchsorted(stops, g, side="right") - 1, 0, len(stops) - 2)
+    lo = stops[idx]
+    t = (g - lo) / (stops[idx + 1] - lo + 1e-6)
+
+    t = t[..., None]
+    rgb = ramp[idx] * (1 - t) + ramp[idx + 1] * t
     return Image.fromarray(np.uint8(np.clip(rgb * 255.0, 0, 255)), mode="RGB")
 
 
 def _add_splatter(img: Image.Image, rng: np.random.Generator, density: float, strength: float, blur: float) -> Image.Image:
     w, h = img.size
-    m = rng.random((h, w), dtype=np.float32)
-    dots = (m < density).astype(np.float32)
-    amp = rng.random((h, w), dtype=np.float32) * dots
-    amp = np.clip(amp * 255.0 * strength, 0, 255).astype(np.uint8)
+    # Dots are sparse (density ~0.001..0.02), so draw the dot count and
+    # positions directly instead of thresholding two full HxW random fields.
+    n = rng.poisson(density * h * w)
+    ys = rng.integers(0, h, n)
+    xs = rng.integers(0, w, n)
+    amp = np.zeros((h, w), dtype=np.uint8)
+    amp[ys, xs] = np.clip(rng.random(n, dtype=np.float32) * 255.0 * strength, 0, 255).astype(np.uint8)
     layer = Image.fromarray(amp, mode="L").filter(ImageFilter.GaussianBlur(radius=blur))
-    layer_rgb = Image.merge("RGB", (layer, layer, layer))
-    return ImageChops.screen(img, layer_rgb)
+    return ImageChops.screen(img, layer.convert("RGB"))
 
 
 def _multiply_grain(img: Image.Image, rng: np.random.Generator, scale: int, strength: float) -> Image.Image:
     w, h = img.size
+    # _value_noise is 8-bit underneath, so the tone mapping can run as a
+    # 256-entry point() LUT on its levels instead of per pixel in numpy.
     g = _value_noise(w, h, scale, rng)
-    # 0.5 körül ingadozzon, és finoman hasson
-    g = (g - 0.5) * 2.0  # -1..1
-    g = 1.0 + g * strength  # 1 +/- strength
-    g = np.clip(g, 0.0, 2.0)
+    grain = Image.fromarray(np.rint(g * 255.0).astype(np.uint8), mode="L")
 
-    grain = Image.fromarray(np.uint8(np.clip(g * 255.0, 0, 255)), mode="L")
-    grain_rgb = Image.merge("RGB", (grain, grain, grain))
-    return ImageChops.multiply(img, grain_rgb)
+    # 0.5 körül ingadozzon, és finoman hasson: 1 +/- strength
+    lut = (np.arange(256, dtype=np.float32) / 255.0 - 0.5) * 2.0 * strength + 1.0
+    lut = np.clip(np.clip(lut, 0.0, 2.0) * 255.0, 0, 255).astype(np.uint8)
+    grain = grain.point(lut.tolist())
+    return ImageChops.multiply(img, grain.convert("RGB"))
 
 
 def _vignette(img: Image.Image, amount: float) -> Image.Image:
     w, h = img.size
-    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
-    cx, cy = (w - 1) / 2.0, (h - 1) / 2.0
-    dx = (xx - cx) / max(1.0, w)
-    dy = (yy - cy) / max(1.0, h)
+    # 1D offsets broadcast to the full grid; no mgrid materialization.
+    dx = ((np.arange(w, dtype=np.float32) - (w - 1) / 2.0) / max(1.0, w))[None, :]
+    dy = ((np.arange(h, dtype=np.float32) - (h - 1) / 2.0) / max(1.0, h))[:, None]
     rr = np.sqrt(dx * dx + dy * dy)
     v = 1.0 - np.clip((rr / np.sqrt(0.5)) * amount, 0.0, 1.0)
-    mask = Image.fromarray(np.uint8(np.clip(v, 0.0, 1.0) * 255.0), mode="L")
-    return ImageChops.multiply(img, Image.merge("RGB", (mask, mask, mask)))
+    v *= 255.0
+    mask = Image.fromarray(v.astype(np.uint8), mode="L")
+    return ImageChops.multiply(img, mask.convert("RGB"))
 
 
 # ------------------------- public API -------------------------
@@ -188,19 +208,25 @@ def make_nebula_background(width_px: int, height_px: int, seed: int, params: Neb
     b1 = _value_noise(width_px, height_px, params.blotch_detail_scale, rng)
     blotch = 0.75 * b0 + 0.25 * b1
     # középtartományt emeljük, hogy "foltok" legyenek, de ne szigetek
-    blotch = _smoothstep(np.clip((blotch - 0.35) / 0.65, 0.0, 1.0))
+    blotch = _smoothstep_range(blotch, 0.35, 0.65)
     blotch_img = Image.fromarray(np.uint8(blotch * 255.0), mode="L").filter(
         ImageFilter.GaussianBlur(radius=params.blotch_blur)
     )
     blotch = np.asarray(blotch_img, dtype=np.float32) / 255.0
 
     # 3) Tejút-sáv – finoman
-    yy, xx = np.mgrid[0:height_px, 0:width_px].astype(np.float32)
     ang = rng.uniform(-0.72, -0.25)
     cx = rng.uniform(0.30, 0.70) * width_px
     cy = rng.uniform(0.30, 0.70) * height_px
-    d = (xx - cx) * np.cos(ang) + (yy - cy) * np.sin(ang)
-    band = np.exp(-(d * d) / (2.0 * (0.24 * max(width_px, height_px)) ** 2))
+    # The band distance is separable: 1D x and y projections, one broadcast
+    # add, then square/scale/exp in place.
+    dx = (np.arange(width_px, dtype=np.float32) - cx) * np.cos(ang)
+    dy = (np.arange(height_px, dtype=np.float32) - cy) * np.sin(ang)
+    band = dx[None, :] + dy[:, None]
+    np.multiply(band, band, out=band)
+    np.negative(band, out=band)
+    np.divide(band, 2.0 * (0.24 * max(width_px, height_px)) ** 2, out=band)
+    np.exp(band, out=band)
     band_img = Image.fromarray(np.uint8(np.clip(band * 255.0, 0, 255)), mode="L").filter(
         ImageFilter.GaussianBlur(radius=params.band_blur)
     )
@@ -208,26 +234,30 @@ def make_nebula_background(width_px: int, height_px: int, seed: int, params: Neb
 
     # 4) Dark lanes – NAGYLÉPTÉKŰ sötétítés, erős blur, hogy ne legyen leopárd
     lanes = _value_noise(width_px, height_px, params.lane_scale, rng)
-    lanes = _smoothstep(np.clip((lanes - 0.20) / 0.80, 0.0, 1.0))
+    lanes = _smoothstep_range(lanes, 0.20, 0.80)
     lanes_img = Image.fromarray(np.uint8(lanes * 255.0), mode="L").filter(
         ImageFilter.GaussianBlur(radius=params.lane_blur)
     )
     lanes = np.asarray(lanes_img, dtype=np.float32) / 255.0
 
     # 5) Kompozit (fátyol domináns + belső foltok + sáv - lane sötétítés)
-    g = (
-        veil * 0.92 +
-        blotch * params.blotch_strength +
-        band * params.band_strength
-    )
-    g = np.clip(g, 0.0, 1.0)
+    # Every step writes into `g` (and the no-longer-needed layers) in place,
+    # so the whole tone chain runs without full-size temporaries.
+    g = veil * 0.92
+    g += np.multiply(blotch, params.blotch_strength, out=blotch)
+    g += np.multiply(band, params.band_strength, out=band)
+    np.clip(g, 0.0, 1.0, out=g)
 
     # sötét csíkok: finoman kivonjuk (nagyon lágy, nincs pötty)
-    g = np.clip(g - lanes * params.lane_strength, 0.0, 1.0)
+    g -= np.multiply(lanes, params.lane_strength, out=lanes)
+    np.clip(g, 0.0, 1.0, out=g)
 
     # tónus
-    g = np.clip((g ** params.fog_gamma) * params.fog_strength, 0.0, 1.0)
-    g = np.clip(g * params.base_darkness, 0.0, 1.0)
+    np.power(g, params.fog_gamma, out=g)
+    g *= params.fog_strength
+    np.clip(g, 0.0, 1.0, out=g)
+    g *= params.base_darkness
+    np.clip(g, 0.0, 1.0, out=g)
 
     # 6) Színezés
     img = _apply_ramp(g)
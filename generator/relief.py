@@ -1,6 +1,7 @@
 # generator/relief.py
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Tuple, List
@@ -10,9 +11,8 @@ import numpy as np
 try:
     import rasterio
     from rasterio.merge import merge as rio_merge
-    from rasterio.mask import mask as rio_mask
     from rasterio.warp import transform_bounds
-    from rasterio.io import MemoryFile
+    from rasterio.windows import Window, bounds as window_bounds, from_bounds
 except ImportError:
     rasterio = None
 
@@ -36,6 +36,13 @@ def _list_dem_tifs(cache_dir: Path) -> List[Path]:
     return sorted([p for p in cache_dir.rglob("*.tif")] + [p for p in cache_dir.rglob("*.tiff")])
 
 
+def _safe_open(path: Path):
+    try:
+        return rasterio.open(path)
+    except Exception:
+        return None
+
+
 def load_dem_wgs84_crop(
     bbox_wgs84: Tuple[float, float, float, float],
     cache_dir: str,
@@ -52,56 +59,44 @@ def load_dem_wgs84_crop(
     if not tifs:
         return None
 
-    datasets = []
-    for p in tifs:
-        try:
-            ds = rasterio.open(p)
-            datasets.append(ds)
-        except Exception:
-            continue
+    # Header reads are GDAL IO (GIL released), so tiles open concurrently.
+    with ThreadPoolExecutor() as pool:
+        datasets = [ds for ds in pool.map(_safe_open, tifs) if ds is not None]
 
     if not datasets:
         return None
 
     try:
-        mosaic, mosaic_transform = rio_merge(datasets)  # (bands, h, w)
-        dem = mosaic[0].astype(np.float32)
-
         mosaic_crs = datasets[0].crs
         if mosaic_crs is None:
             return None
 
         bbox_in_crs = transform_bounds("EPSG:4326", mosaic_crs, *bbox_wgs84, densify_pts=21)
-        minx, miny, maxx, maxy = bbox_in_crs
-
-        geom_crs = {
-            "type": "Polygon",
-            "coordinates": [[
-                (minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny)
-            ]]
-        }
-
-        profile = {
-            "driver": "GTiff",
-            "height": dem.shape[0],
-            "width": dem.shape[1],
-            "count": 1,
-            "dtype": "float32",
-            "crs": mosaic_crs,
-            "transform": mosaic_transform,
-            "nodata": None,
-        }
-
-        with MemoryFile() as memfile:
-            with memfile.open(**profile) as tmp:
-                tmp.write(dem, 1)
-                cropped, cropped_transform = rio_mask(tmp, [geom_crs], crop=True, filled=False)
-
-        cropped_dem = cropped[0].astype(np.float32)
-        if np.ma.isMaskedArray(cropped_dem):
-            cropped_dem = cropped_dem.filled(np.nan)
-
-        return cropped_dem, cropped_transform, mosaic_crs
+
+        # merge() anchors its output grid at the bounds' corner; snap them
+        # outward to the tiles' pixel grid so the crop is a plain read, not
+        # a half-pixel resample.
+        win = from_bounds(*bbox_in_crs, transform=datasets[0].transform)
+        col0, row0 = np.floor(win.col_off), np.floor(win.row_off)
+        col1 = np.ceil(win.col_off + win.width)
+        row1 = np.ceil(win.row_off + win.height)
+        bbox_in_crs = window_bounds(
+            Window(col0, row0, col1 - col0, row1 - row0),
+            datasets[0].transform,
+        )
+
+        # merge(bounds=...) only reads the tile windows intersecting the crop
+        # and writes straight into a float32 nan-initialised array, so there
+        # is no full mosaic, MemoryFile round-trip or mask pass.
+        with rasterio.Env(GDAL_NUM_THREADS="ALL_CPUS", GDAL_CACHEMAX=512):
+            cropped, cropped_transform = rio_merge(
+                datasets,
+                bounds=bbox_in_crs,
+                nodata=np.nan,
+                dtype="float32",
+            )
+
+        return cropped[0], cropped_transform, mosaic_crs
     finally:
         for ds in datasets:
             try:
@@ -124,32 +119,47 @@ def hillshade(
     xres = transform.a
     yres = -transform.e
 
-    dem2 = dem.copy()
-    nanmask = np.isnan(dem2)
+    # The DEM is only read below, so it is used as-is unless gaps need
+    # filling; np.where then builds the filled copy in the same pass.
+    dem2 = dem
+    nanmask = np.isnan(dem)
     if nanmask.any():
-        med = np.nanmedian(dem2)
-        if np.isnan(med):
-            return np.full_like(dem2, np.nan, dtype=np.float32)
-        dem2[nanmask] = med
+        # Any representative level works as a gap filler before the
+        # gradient; the mean avoids the full sort behind nanmedian.
+        fill = np.nanmean(dem) if not nanmask.all() else np.nan
+        if np.isnan(fill):
+            return np.full_like(dem, np.nan, dtype=np.float32)
+        dem2 = np.where(nanmask, fill, dem)
 
     dzdx = np.gradient(dem2, axis=1) / (xres if xres != 0 else 1.0)
     dzdy = np.gradient(dem2, axis=0) / (yres if yres != 0 else 1.0)
     dzdx *= z_factor
     dzdy *= z_factor
 
-    slope = np.pi / 2.0 - np.arctan(np.hypot(dzdx, dzdy))
-    aspect = np.arctan2(dzdy, -dzdx)
-
     az = np.deg2rad(azimuth_deg)
     alt = np.deg2rad(altitude_deg)
 
-    shaded = (
-        np.sin(alt) * np.sin(slope) +
-        np.cos(alt) * np.cos(slope) * np.cos(az - aspect)
-    )
-
-    shaded = (shaded - shaded.min()) / (shaded.max() - shaded.min() + 1e-9)
-    shaded = shaded.astype(np.float32)
+    # Closed form of
+    #   sin(alt)*sin(slope) + cos(alt)*cos(slope)*cos(az - aspect)
+    # with slope = pi/2 - atan(|grad|), aspect = atan2(dzdy, -dzdx):
+    #   (sin(alt) + cos(alt)*(dzdy*sin(az) - dzdx*cos(az))) / sqrt(1 + |grad|^2)
+    # Only scalar trig remains; the per-pixel work is a few fused passes.
+    norm = dzdx * dzdx
+    norm += dzdy * dzdy
+    norm += 1.0
+    np.sqrt(norm, out=norm)
+
+    shaded = dzdy * (np.cos(alt) * np.sin(az))
+    shaded -= dzdx * (np.cos(alt) * np.cos(az))
+    shaded += np.sin(alt)
+    shaded /= norm
+
+    # Two reductions, then one in-place affine pass.
+    lo = shaded.min()
+    hi = shaded.max()
+    shaded -= lo
+    shaded *= 1.0 / (hi - lo + 1e-9)
+    shaded = shaded.astype(np.float32, copy=False)
     shaded[nanmask] = np.nan
     return shaded
 
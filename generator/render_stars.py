@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import importlib
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
 from geopy.geocoders import Nominatim
+from matplotlib.collections import LineCollection
 from matplotlib.patches import Circle
 from pytz import timezone, utc
 from skyfield.api import Star, load, load_constellation_map, wgs84
@@ -102,6 +104,11 @@ def _local_to_utc(*, local_dt: datetime, lat: float, lon: float) -> datetime:
     return localized.astimezone(utc)
 
 
+# Star and constellation projections depend only on place, time and
+# magnitude/FOV settings, not on the print size. Batch runs render the same
+# sky for every size key, so the projections are memoized. Returned arrays
+# and lists are shared between calls and must not be modified in place.
+@lru_cache(maxsize=8)
 def _project_visible_stars(
     *,
     lat: float,
@@ -162,6 +169,7 @@ def _project_visible_stars(
     return x, y, mag
 
 
+@lru_cache(maxsize=8)
 def _project_constellation_segments(
     *,
     lat: float,
@@ -176,31 +184,25 @@ def _project_constellation_segments(
         if count < 2:
             return []
 
-        selected = [0]
-        remaining = set(range(1, count))
-        edges: list[tuple[int, int]] = []
-
-        while remaining:
-            best_dist = None
-            best_i = -1
-            best_j = -1
-            remaining_arr = np.fromiter(remaining, dtype=int)
+        # Prim's algorithm on the full squared-distance matrix, computed
+        # in one broadcast instead of one distance pass per selected star.
+        diffs = points_xy[:, None, :] - points_xy[None, :, :]
+        dist_sq = np.einsum("ijk,ijk->ij", diffs, diffs)
 
-            for i in selected:
-                diffs = points_xy[remaining_arr] - points_xy[i]
-                dist_sq = np.einsum("ij,ij->i", diffs, diffs)
-                min_idx = int(np.argmin(dist_sq))
-                candidate_dist = float(dist_sq[min_idx])
-                candidate_j = int(remaining_arr[min_idx])
+        in_tree = np.zeros(count, dtype=bool)
+        in_tree[0] = True
+        best_dist = dist_sq[0].copy()
+        best_from = np.zeros(count, dtype=int)
+        edges: list[tuple[int, int]] = []
 
-                if best_dist is None or candidate_dist < best_dist:
-                    best_dist = candidate_dist
-                    best_i = i
-                    best_j = candidate_j
+        for _ in range(count - 1):
+            j = int(np.argmin(np.where(in_tree, np.inf, best_dist)))
+            edges.append((int(best_from[j]), j))
+            in_tree[j] = True
 
-            edges.append((best_i, best_j))
-            selected.append(best_j)
-            remaining.remove(best_j)
+            closer = dist_sq[j] < best_dist
+            best_dist[closer] = dist_sq[j][closer]
+            best_from[closer] = j
 
         return edges
 
@@ -280,6 +282,27 @@ def _project_constellation_segments(
     return segments
 
 
+_PROMINENT_NEBULA_PARAMS = NebulaParams(
+    base_darkness=0.96,
+    fog_strength=1.85,
+    blotch_strength=1.30,
+    band_strength=0.80,
+    lane_strength=0.22,
+    grain_strength=0.10,
+    splatter_small_strength=0.24,
+    splatter_mid_strength=0.20,
+    splatter_big_strength=0.16,
+    final_blur=0.30,
+    unsharp_radius=2.8,
+    unsharp_percent=145,
+    unsharp_threshold=1,
+)
+
+# PDF writer settings for the print files: text goes in as a subset
+# TrueType font instead of one Type 3 procedure per glyph.
+_PDF_RC = {"pdf.fonttype": 42}
+
+
 def _build_prominent_nebula_layer(
     *,
     width_cm: float,
@@ -294,21 +317,7 @@ def _build_prominent_nebula_layer(
         width_px=width_px,
         height_px=height_px,
         seed=seed,
-        params=NebulaParams(
-            base_darkness=0.96,
-            fog_strength=1.85,
-            blotch_strength=1.30,
-            band_strength=0.80,
-            lane_strength=0.22,
-            grain_strength=0.10,
-            splatter_small_strength=0.24,
-            splatter_mid_strength=0.20,
-            splatter_big_strength=0.16,
-            final_blur=0.30,
-            unsharp_radius=2.8,
-            unsharp_percent=145,
-            unsharp_threshold=1,
-        ),
+        params=_PROMINENT_NEBULA_PARAMS,
     )
     return np.asarray(nebula, dtype=np.uint8)
 
@@ -435,73 +444,6 @@ def render_star_map_stub(
     height_cm = float(getattr(spec, "height_cm"))
     layout = build_star_layout(width_cm, height_cm, style=StarStyle(style))
 
-    def cm_to_fig_x(x_cm: float) -> float:
-        return x_cm / width_cm
-
-    def cm_to_fig_y(y_cm: float) -> float:
-        return y_cm / height_cm
-
-    fig = plt.figure(figsize=fig_size)
-    fig.patch.set_facecolor("#f7f5ef")
-
-    ax = fig.add_axes([
-        cm_to_fig_x(layout.artwork_area.x_cm),
-        cm_to_fig_y(layout.artwork_area.y_cm),
-        cm_to_fig_x(layout.artwork_area.width_cm),
-        cm_to_fig_y(layout.artwork_area.height_cm),
-    ])
-    ax.set_facecolor("none")
-
-    radius = layout.circle.radius_cm / min(layout.artwork_area.width_cm, layout.artwork_area.height_cm)
-    radius = float(max(0.08, min(0.49, radius)))
-    pad = radius * 0.06
-
-    sky_disk = Circle((0.0, 0.0), radius, color="#05112e", fill=True, zorder=0)
-    ax.add_patch(sky_disk)
-
-    if x.size > 0:
-        marker_size = max_star_size * 10 ** (magnitudes / -2.5)
-        marker_size = np.clip(marker_size, 1.1, max_star_size)
-
-        # Soft halo layer to make stars pop on print and preview.
-        halo = ax.scatter(
-            x * radius,
-            y * radius,
-            s=np.clip(marker_size * 3.1, 3.0, max_star_size * 3.4),
-            color="#dfe8ff",
-            marker="o",
-            linewidths=0,
-            alpha=0.14,
-            zorder=1,
-        )
-        halo.set_clip_path(sky_disk)
-
-        scatter = ax.scatter(
-            x * radius,
-            y * radius,
-            s=np.clip(marker_size * 1.2, 1.4, max_star_size * 1.25),
-            color="#ffffff",
-            marker="o",
-            linewidths=0,
-            zorder=2,
-        )
-        scatter.set_clip_path(sky_disk)
-
-        # A compact bright core helps readability for smaller/fainter stars.
-        core = ax.scatter(
-            x * radius,
-            y * radius,
-            s=np.clip(marker_size * 0.32, 0.65, max_star_size * 0.34),
-            color="#fffdf8",
-            marker="o",
-            linewidths=0,
-            alpha=0.9,
-            zorder=3,
-        )
-        core.set_clip_path(sky_disk)
-
-    ax.add_patch(Circle((0.0, 0.0), radius, fill=False, linewidth=1.2, edgecolor="#d9dce9", zorder=4))
-
     date_line = local_dt.strftime("%Y-%m-%d %H:%M")
     fallback_custom = f"{lat:.4f}, {lon:.4f}"
     custom_line = custom_message.strip() if custom_message.strip() else fallback_custom
@@ -717,7 +659,8 @@ def _render_star_map_sky_circle(
     ax.set_aspect("equal", adjustable="box")
     ax.axis("off")
 
-    fig.savefig(pdf_path, dpi=int(getattr(spec, "dpi", 300) or 300), facecolor=fig.get_facecolor())
+    with plt.rc_context(_PDF_RC):
+        fig.savefig(pdf_path, dpi=int(getattr(spec, "dpi", 300) or 300), facecolor=fig.get_facecolor())
     fig.savefig(png_path, dpi=preview_dpi, facecolor=fig.get_facecolor())
     plt.close(fig)
 
@@ -892,67 +835,69 @@ def _render_star_map_sky(
             zorder=3,
         )
 
-    constellation_node_points: list[tuple[float, float]] = []
+    node_x = np.empty(0)
+    node_y = np.empty(0)
     if constellation_segments:
-        for (x1, y1), (x2, y2) in constellation_segments:
-            x_pair = np.array([x1, x2], dtype=float)
-            y_pair = np.array([y1, y2], dtype=float)
-
-            x_centered = x_pair - transform_center_x
-            y_centered = y_pair - transform_center_y
-            r = np.hypot(x_centered, y_centered)
-            r_norm = np.clip(r / transform_r_scale, 0.0, 1.0)
-            theta = np.arctan2(y_centered, x_centered)
-            c = np.cos(theta)
-            s = np.sin(theta)
-            denom = np.maximum(np.maximum(np.abs(c), np.abs(s)), 1e-6)
-
-            x_line = (r_norm * c / denom) * 0.98
-            y_line = (r_norm * s / denom) * 0.98
-
-            segment_length = float(np.hypot(x_line[1] - x_line[0], y_line[1] - y_line[0]))
-            if segment_length < 0.055:
-                continue
+        # All segments mapped to the square display space at once:
+        # shape (n_segments, 2 endpoints, xy).
+        seg = np.asarray(constellation_segments, dtype=float)
+
+        x_centered = seg[..., 0] - transform_center_x
+        y_centered = seg[..., 1] - transform_center_y
+        r = np.hypot(x_centered, y_centered)
+        r_norm = np.clip(r / transform_r_scale, 0.0, 1.0)
+        theta = np.arctan2(y_centered, x_centered)
+        c = np.cos(theta)
+        s = np.sin(theta)
+        denom = np.maximum(np.maximum(np.abs(c), np.abs(s)), 1e-6)
 
-            # Keep constellation lines intentionally very subtle.
-            ax.plot(
-                x_line,
-                y_line,
-                color="#b7d2ff",
-                linewidth=1.25,
+        seg_display = np.stack(
+            ((r_norm * c / denom) * 0.98, (r_norm * s / denom) * 0.98),
+            axis=-1,
+        )
+
+        segment_length = np.hypot(
+            seg_display[:, 1, 0] - seg_display[:, 0, 0],
+            seg_display[:, 1, 1] - seg_display[:, 0, 1],
+        )
+        seg_display = seg_display[segment_length >= 0.055]
+
+        # Keep constellation lines intentionally very subtle.
+        ax.add_collection(
+            LineCollection(
+                seg_display,
+                colors="#b7d2ff",
+                linewidths=1.25,
                 alpha=0.16,
                 zorder=5.2,
-                solid_capstyle="round",
+                capstyle="round",
             )
+        )
 
-            # Thin core stroke that remains barely visible.
-            ax.plot(
-                x_line,
-                y_line,
-                color="#f6fbff",
-                linewidth=0.58,
+        # Thin core stroke that remains barely visible.
+        ax.add_collection(
+            LineCollection(
+                seg_display,
+                colors="#f6fbff",
+                linewidths=0.58,
                 alpha=0.36,
                 zorder=5.4,
-                solid_capstyle="round",
+                capstyle="round",
             )
+        )
 
-            constellation_node_points.append((float(x_line[0]), float(y_line[0])))
-            constellation_node_points.append((float(x_line[1]), float(y_line[1])))
-
-    if constellation_node_points:
-        # Deduplicate near-identical points to avoid over-brightening shared vertices.
-        dedup_nodes: list[tuple[float, float]] = []
-        seen_nodes: set[tuple[int, int]] = set()
-        for nx, ny in constellation_node_points:
-            key = (int(round(nx * 20000.0)), int(round(ny * 20000.0)))
-            if key in seen_nodes:
-                continue
-            seen_nodes.add(key)
-            dedup_nodes.append((nx, ny))
+        # Deduplicate near-identical points to avoid over-brightening shared
+        # vertices: one np.unique over the snapped keys, first occurrence
+        # kept in segment order.
+        nodes = seg_display.reshape(-1, 2)
+        keys = np.round(nodes * 20000.0).astype(np.int64)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        nodes = nodes[np.sort(first)]
 
-        node_x = np.array([p[0] for p in dedup_nodes], dtype=float)
-        node_y = np.array([p[1] for p in dedup_nodes], dtype=float)
+        node_x = nodes[:, 0]
+        node_y = nodes[:, 1]
 
+    if node_x.size > 0:
         # Layered radial glow: strong center to transparent edge.
         ax.scatter(
             node_x,
@@ -1219,12 +1164,13 @@ def _render_star_map_sky(
         color="#b0b0b0",
     )
 
-    fig.savefig(
-        pdf_path,
-        dpi=int(getattr(spec, "dpi", 300) or 300),
-        facecolor=fig.get_facecolor(),
-        transparent=True,
-    )
+    with plt.rc_context(_PDF_RC):
+        fig.savefig(
+            pdf_path,
+            dpi=int(getattr(spec, "dpi", 300) or 300),
+            facecolor=fig.get_facecolor(),
+            transparent=True,
+        )
     fig.savefig(
         png_path,
         dpi=preview_dpi,
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Dict, List
 
 
@@ -13,6 +14,14 @@ class RoadStyle:
     base_width: float
     multipliers: Dict[str, float]
 
+    @cached_property
+    def widths(self) -> Dict[str, float]:
+        # Final line width per road class, folded once per style.
+        return {
+            cls: self.base_width * mult
+            for cls, mult in self.multipliers.items()
+        }
+
 
 # =============================================================================
 # ENGINE-SPECIFIC STYLE CONFIGS